@@ -1,6 +1,199 @@
 import xlsxwriter
 import io
-import re
+
+
+def _skip_spaces(text, pos):
+    """Returns the first position at or after pos that is not whitespace."""
+    length = len(text)
+    while pos < length and text[pos].isspace():
+        pos += 1
+    return pos
+
+
+def _join_values(values):
+    """Joins the items of a bracketed list as "a, b, c" without their quotes."""
+    return ', '.join([v.strip().strip('"').strip("'")
+                      for v in values.split(',')])
+
+
+def _scan_list_rules(text, unescape):
+    """
+    Finds the Rules ... =[...] and Rules ... - [...] entries in one pass.
+    Returns the entries and the text with them removed.
+    """
+    extracted = []
+    pieces = []
+    previous_end = 0
+    start = text.find("Rules")
+    while start != -1:
+        # The list opens at the first "[" preceded (ignoring whitespace) by "=" or "-"
+        bracket = text.find('[', start + 6)
+        while bracket != -1:
+            separator = bracket - 1
+            while text[separator].isspace():
+                separator -= 1
+            if text[separator] in "=-":
+                break
+            bracket = text.find('[', bracket + 1)
+        if bracket == -1:
+            break
+        close = text.find(']', bracket + 1)
+        if close == -1:
+            # No later list can be closed either
+            break
+
+        rule_desc = text[start:separator].strip().rstrip('= -').strip()
+        values = text[bracket + 1:close]
+        if unescape:
+            values = values.replace('\\', '')
+        extracted.append([rule_desc, _join_values(values)])
+
+        pieces.append(text[previous_end:start])
+        previous_end = close + 1
+        start = text.find("Rules", previous_end)
+
+    if not extracted:
+        return extracted, text
+    pieces.append(text[previous_end:])
+    return extracted, "".join(pieces)
+
+
+def _scan_single_rules(text):
+    """Finds the Rules ... - value and Rules ... . value entries in one pass."""
+    extracted = []
+    length = len(text)
+    # Next "-" and "." positions, kept between rules so that each is searched for once
+    dash = dot = -1
+    start = text.find("Rules")
+    while start != -1:
+        # The value starts after the first "-" or "." that does not open a list
+        position = start + 5
+        while True:
+            if dash != length and dash < position:
+                dash = text.find('-', position)
+                dash = length if dash == -1 else dash
+            if dot != length and dot < position:
+                dot = text.find('.', position)
+                dot = length if dot == -1 else dot
+            separator = min(dash, dot)
+            if separator == length:
+                return extracted
+            after = _skip_spaces(text, separator + 1)
+            if after == length or text[after] != '[':
+                break
+            position = separator + 1
+
+        # The value runs up to the next rule or the end of the text
+        end = text.find("Rules", separator + 1)
+        rule_desc = text[start:separator].strip().rstrip('= -').strip()
+        value = text[separator + 1:length if end == -1 else end].strip().strip('.').strip()
+        if value:
+            extracted.append([rule_desc, value])
+        start = end
+    return extracted
+
+
+def _value_list_start(text, pos):
+    """
+    Matches whitespace, value, =, a quote and [ at pos.
+    Returns the position after the "[" or -1.
+    """
+    length = len(text)
+    if pos >= length or not text[pos].isspace():
+        return -1
+    pos = _skip_spaces(text, pos)
+    if not text.startswith("value", pos):
+        return -1
+    pos = _skip_spaces(text, pos + 5)
+    if pos >= length or text[pos] != '=':
+        return -1
+    pos = _skip_spaces(text, pos + 1)
+    if not text.startswith(('"[', "'["), pos):
+        return -1
+    return pos + 2
+
+
+def _find_rules_word(text, pos):
+    """Finds the next "Rules" at or after pos that starts a word."""
+    start = text.find("Rules", pos)
+    while start > 0 and (text[start - 1].isalnum() or text[start - 1] == '_'):
+        start = text.find("Rules", start + 1)
+    return start
+
+
+def _scan_value_rules(text):
+    """
+    Finds the "Rules ..." value="[...]" and Rules ... value=["..."] entries in one pass.
+    Returns the entries and the text with them removed.
+    """
+    extracted = []
+    pieces = []
+    length = len(text)
+    previous_end = position = 0
+    quote = text.find('"')
+    rules = _find_rules_word(text, 0)
+    while quote != -1 or rules != -1:
+        if rules == -1 or quote != -1 and quote < rules:
+            # Quoted rule: "...", then value=
+            start = quote
+            desc_end = text.find('"', start + 1)
+            if desc_end == -1:
+                # Last quote in the text
+                quote = -1
+                continue
+            quote = desc_end
+            if desc_end == start + 1:
+                continue
+            list_start = _value_list_start(text, desc_end + 1)
+            if list_start == -1:
+                continue
+            rule_desc = text[start + 1:desc_end]
+        else:
+            # Unquoted rule: Rules followed by a word, then the first value= after it
+            start = rules
+            rules = _find_rules_word(text, start + 1)
+            word_end = start + 5
+            while word_end < length and not text[word_end].isspace() and text[word_end] not in "=:-":
+                word_end += 1
+            if word_end == start + 5:
+                continue
+            list_start = -1
+            value = text.find("value", word_end + 1)
+            while value != -1:
+                if text[value - 1].isspace():
+                    desc_end = value - 1
+                    while text[desc_end - 1].isspace():
+                        desc_end -= 1
+                    list_start = _value_list_start(text, desc_end)
+                    if list_start != -1:
+                        break
+                value = text.find("value", value + 1)
+            if list_start == -1:
+                # No later rule can have a value= list either
+                break
+            rule_desc = text[start:desc_end]
+
+        # The list ends at the first "]" followed by a quote
+        close = text.find(']', list_start)
+        while close != -1 and (close + 1 == length or text[close + 1] not in "\"'"):
+            close = text.find(']', close + 1)
+        if close == -1:
+            break
+
+        values = text[list_start:close].replace('\\', '')
+        extracted.append([rule_desc.strip(), _join_values(values)])
+
+        pieces.append(text[previous_end:start])
+        previous_end = position = close + 2
+        if quote != -1 and quote < position:
+            quote = text.find('"', position)
+        if rules != -1 and rules < position:
+            rules = _find_rules_word(text, position)
+
+    if not extracted:
+        return extracted, text
+    pieces.append(text[previous_end:])
+    return extracted, "".join(pieces)
 
 
 def extract_rules(text):
@@ -13,41 +206,18 @@ def extract_rules(text):
       - Rules ... - ["...", "..."]
       - Rules ... - ... (plain text)
       - Rules ... . ... (plain text)
+    The text is read by a small tokenizer instead of regular expressions: each
+    stage walks its input once and passes on only what it did not consume.
     """
-    extracted = []
-
-    pattern_value = r'(?:"([^"]+)"|(\bRules[^\s=:-]+.*?))\s+value\s*=\s*(?:"|\')\[(.*?)\](?:"|\')'
-    pattern_list = r'(Rules.*?)(?:=|-)\s*\[(.*?)\]'
-    pattern_single = r'(Rules.*?)(?:-|\.)(?!\s*\[)(.*?)(?=(?:Rules|$))'
-
     # First, extract all rules with quoted or unquoted value=
-    for match in re.finditer(pattern_value, text, re.DOTALL):
-        rule_desc = match.group(1) or match.group(2)
-        values = match.group(3).replace('\\', '')
-        result = ', '.join([v.strip().strip('"').strip("'")
-                           for v in values.split(',')])
-        extracted.append([rule_desc.strip(), result])
-
-    # Remove already matched parts to avoid duplicates
-    text = re.sub(pattern_value, '', text, flags=re.DOTALL)
+    extracted, text = _scan_value_rules(text)
 
     # Then, extract all rules with lists (excluding value=)
-    for match in re.finditer(pattern_list, text, re.DOTALL):
-        rule_desc = match.group(1).strip().rstrip('= -').strip()
-        values = match.group(2).replace('\\', '')
-        result = ', '.join([v.strip().strip('"').strip("'")
-                           for v in values.split(',')])
-        extracted.append([rule_desc, result])
-
-    # Remove already matched parts to avoid duplicates
-    text_cleaned = re.sub(pattern_list, '', text, flags=re.DOTALL)
+    list_rules, text = _scan_list_rules(text, unescape=True)
+    extracted.extend(list_rules)
 
     # Now extract single-value rules (not followed by [ ... ])
-    for match in re.finditer(pattern_single, text_cleaned, re.DOTALL):
-        rule_desc = match.group(1).strip().rstrip('= -').strip()
-        value = match.group(2).strip().strip('.').strip()
-        if value:
-            extracted.append([rule_desc, value])
+    extracted.extend(_scan_single_rules(text))
 
     return extracted
 
@@ -1,5 +1,4 @@
 import os
-import re
 import sys
 # from bs4 import BeautifulSoup
 import io
@@ -10,6 +9,97 @@ import xlsxwriter
 #     return bool(BeautifulSoup(text, "html.parser").find())
 
 
+def _skip_spaces(text, pos):
+    """Returns the first position at or after pos that is not whitespace."""
+    length = len(text)
+    while pos < length and text[pos].isspace():
+        pos += 1
+    return pos
+
+
+def _join_values(values):
+    """Joins the items of a bracketed list as "a, b, c" without their quotes."""
+    return ', '.join([v.strip().strip('"').strip("'")
+                      for v in values.split(',')])
+
+
+def _scan_list_rules(text, unescape):
+    """
+    Finds the Rules ... =[...] and Rules ... - [...] entries in one pass.
+    Returns the entries and the text with them removed.
+    """
+    extracted = []
+    pieces = []
+    previous_end = 0
+    start = text.find("Rules")
+    while start != -1:
+        # The list opens at the first "[" preceded (ignoring whitespace) by "=" or "-"
+        bracket = text.find('[', start + 6)
+        while bracket != -1:
+            separator = bracket - 1
+            while text[separator].isspace():
+                separator -= 1
+            if text[separator] in "=-":
+                break
+            bracket = text.find('[', bracket + 1)
+        if bracket == -1:
+            break
+        close = text.find(']', bracket + 1)
+        if close == -1:
+            # No later list can be closed either
+            break
+
+        rule_desc = text[start:separator].strip().rstrip('= -').strip()
+        values = text[bracket + 1:close]
+        if unescape:
+            values = values.replace('\\', '')
+        extracted.append([rule_desc, _join_values(values)])
+
+        pieces.append(text[previous_end:start])
+        previous_end = close + 1
+        start = text.find("Rules", previous_end)
+
+    if not extracted:
+        return extracted, text
+    pieces.append(text[previous_end:])
+    return extracted, "".join(pieces)
+
+
+def _scan_single_rules(text):
+    """Finds the Rules ... - value and Rules ... . value entries in one pass."""
+    extracted = []
+    length = len(text)
+    # Next "-" and "." positions, kept between rules so that each is searched for once
+    dash = dot = -1
+    start = text.find("Rules")
+    while start != -1:
+        # The value starts after the first "-" or "." that does not open a list
+        position = start + 5
+        while True:
+            if dash != length and dash < position:
+                dash = text.find('-', position)
+                dash = length if dash == -1 else dash
+            if dot != length and dot < position:
+                dot = text.find('.', position)
+                dot = length if dot == -1 else dot
+            separator = min(dash, dot)
+            if separator == length:
+                return extracted
+            after = _skip_spaces(text, separator + 1)
+            if after == length or text[after] != '[':
+                break
+            position = separator + 1
+
+        # The value runs up to the next rule or the end of the text
+        end = text.find("Rules", separator + 1)
+        rule_desc = text[start:separator].strip().rstrip('= -').strip()
+        value = text[separator + 1:length if end == -1 else end].strip().strip('.').strip()
+        if value:
+            extracted.append([rule_desc, value])
+        start = end
+    return extracted
+
+
 def extract_rules(text):
     """
     Extract rules and their values from the input.
@@ -18,31 +108,14 @@ def extract_rules(text):
       - Rules ... - ["...", "..."]
       - Rules ... - ... (plain text)
       - Rules ... . ... (plain text)
+    The text is read by a small tokenizer instead of regular expressions: each
+    stage walks its input once and passes on only what it did not consume.
     """
-    # Pattern for rules with a list of values in brackets
-    pattern_list = r'(Rules.*?)(?:=|-)\s*\[(.*?)\]'
-    # Pattern for rules with a single value after dash or period
-    pattern_single = r'(Rules.*?)(?:-|\.)(?!\s*\[)(.*?)(?=(?:Rules|$))'
-
-    extracted = []
-
     # First, extract all rules with lists
-    for match in re.finditer(pattern_list, text, re.DOTALL):
-        rule_desc = match.group(1).strip().rstrip('= -').strip()
-        values = match.group(2)
-        result = ', '.join([v.strip().strip('"').strip("'")
-                           for v in values.split(',')])
-        extracted.append([rule_desc, result])
-
-    # Remove already matched parts to avoid duplicates
-    text_cleaned = re.sub(pattern_list, '', text, flags=re.DOTALL)
+    extracted, text_cleaned = _scan_list_rules(text, unescape=False)
 
     # Now extract single-value rules (not followed by [ ... ])
-    for match in re.finditer(pattern_single, text_cleaned, re.DOTALL):
-        rule_desc = match.group(1).strip().rstrip('= -').strip()
-        value = match.group(2).strip().strip('.').strip()
-        if value:  # Only add if value is not empty
-            extracted.append([rule_desc, value])
+    extracted.extend(_scan_single_rules(text_cleaned))
 
     return extracted
 
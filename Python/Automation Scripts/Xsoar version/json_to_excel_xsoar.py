@@ -1,9 +1,179 @@
 import json
 import io
+import itertools
 import xlsxwriter
 import re
 
 
+# Compiled once: the start of a quoted JSON array or Input object, e.g. value="[ or Input="{
+ANCHOR_PATTERN = re.compile(r'="[\[{]')
+# Compiled once: the start of an embedded JSON object or array. The first token is checked too,
+# so that prose such as {entry or [2024-01-01 12:00] is not handed to the decoder
+JSON_START_PATTERN = re.compile(
+    r'\{\s*["}]|\[\s*(?:[\]\[{"]|-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\s*[,\]]|true|false|null)')
+JSON_DECODER = json.JSONDecoder()
+# One level of backslash escaping, as in Input="{\"Commands\": ...}"
+ESCAPE_PATTERN = re.compile(r'\\(u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|[0-7]{1,3}|.)', re.DOTALL)
+ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f", "a": "\a", "v": "\v",
+           '"': '"', "'": "'", "\\": "\\", "\n": ""}
+# JSON whitespace, as skipped by the json module between tokens
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def iter_json_documents(text, pos=0):
+    """
+    Lazily yield (document, start, end) for every JSON object or array embedded in the text.
+    JSONDecoder.raw_decode reads each document up to its own closing bracket and the search
+    resumes right after it, so text between or after the documents is never rescanned.
+    """
+    while True:
+        match = JSON_START_PATTERN.search(text, pos)
+        if match is None:
+            return
+        try:
+            document, end = JSON_DECODER.raw_decode(text, match.start())
+        except ValueError:
+            # Not JSON (or not a complete document), try the next bracket
+            pos = match.start() + 1
+            continue
+        yield document, match.start(), end
+        pos = end
+
+
+def _unescape_char(match):
+    """Decode one backslash escape matched by ESCAPE_PATTERN."""
+    code = match.group(1)
+    if code[0] in "ux" and len(code) > 1:
+        return chr(int(code[1:], 16))
+    if code[0] in "01234567":
+        return chr(int(code, 8))
+    return ESCAPES.get(code, match.group(0))
+
+
+def unescape_json(text, start=0, end=None):
+    """
+    Remove one level of backslash escaping from the JSON payload at text[start:end].
+    Returns (json_text, pos), the text holding the payload and the position where it starts.
+    Plain JSON (its first quote is not escaped) is neither copied nor decoded, the input text
+    itself is returned. An escaped payload is the content of a quoted argument, so it is decoded
+    in one pass by the C string scanner of the json module, up to the closing quote. Escapes
+    that JSON does not know fall back to a regex substitution. Unlike the unicode_escape codec,
+    non-ASCII text is kept as it is.
+    """
+    if end is None:
+        end = len(text)
+    quote = text.find('"', start, end)
+    if quote == -1:
+        escaped = text.find("\\", start, end) != -1
+    else:
+        escaped = quote > start and text[quote - 1] == "\\"
+    if not escaped:
+        return text, start
+    try:
+        return json.decoder.scanstring(text, start, False)[0], 0
+    except ValueError:
+        return ESCAPE_PATTERN.sub(_unescape_char, text[start:end]), 0
+
+
+def load_payload(text, start=0, end=None):
+    """Decode the JSON document at text[start:end], unescaping it first when needed."""
+    return JSON_DECODER.raw_decode(*unescape_json(text, start, end))[0]
+
+
+def iter_commands(text, pos=0):
+    """
+    Lazily yield the entries of the "Commands" array of the JSON object at text[pos:].
+    The object is walked key by key and every entry is decoded on its own with raw_decode, so
+    the array is never held in memory as a whole. The other values are decoded and dropped,
+    which still validates the rest of the document. Nothing is yielded when the payload is not
+    an object or has no Commands array.
+    """
+    skip = WHITESPACE.match
+    pos = skip(text, pos).end()
+    if text[pos:pos + 1] != '{':
+        return
+    pos = skip(text, pos + 1).end()
+    if text[pos:pos + 1] == '}':
+        return
+    while True:
+        if text[pos:pos + 1] != '"':
+            raise json.JSONDecodeError("Expecting property name enclosed in double quotes", text, pos)
+        key, pos = json.decoder.scanstring(text, pos + 1)
+        pos = skip(text, pos).end()
+        if text[pos:pos + 1] != ':':
+            raise json.JSONDecodeError("Expecting ':' delimiter", text, pos)
+        pos = skip(text, pos + 1).end()
+
+        if key == "Commands" and text[pos:pos + 1] == '[':
+            pos = skip(text, pos + 1).end()
+            if text[pos:pos + 1] == ']':
+                pos += 1
+            else:
+                while True:
+                    command, pos = JSON_DECODER.raw_decode(text, pos)
+                    yield command
+                    pos = skip(text, pos).end()
+                    if text[pos:pos + 1] == ']':
+                        pos += 1
+                        break
+                    if text[pos:pos + 1] != ',':
+                        raise json.JSONDecodeError("Expecting ',' delimiter", text, pos)
+                    pos = skip(text, pos + 1).end()
+        else:
+            pos = JSON_DECODER.raw_decode(text, pos)[1]
+
+        pos = skip(text, pos).end()
+        if text[pos:pos + 1] == '}':
+            return
+        if text[pos:pos + 1] != ',':
+            raise json.JSONDecodeError("Expecting ',' delimiter", text, pos)
+        pos = skip(text, pos + 1).end()
+
+
+def classify_input(text):
+    """
+    Scan the input once and classify it.
+    Returns (kind, spans) where kind is "double_array", "array", "object", "fallback" or None
+    and spans are the (start, end) positions of the JSON text in the input. Object and fallback
+    spans run to the end of the line or input, the documents in them end at their own closing
+    bracket (see iter_json_documents()).
+    """
+    arrays = []
+    object_spans = []
+    array_end = 0
+    line_end = -1
+    for anchor in ANCHOR_PATTERN.finditer(text):
+        start = anchor.end() - 1
+        if start > line_end:
+            # Arrays and objects end on the line they start on
+            line_end = text.find('\n', start)
+            if line_end == -1:
+                line_end = len(text)
+        if text[start] == '[':
+            # ="[...]", up to the first ]" (arrays do not overlap)
+            if anchor.start() >= array_end:
+                close = text.find(']"', start + 1, line_end)
+                if close != -1:
+                    arrays.append((start, close + 1))
+                    array_end = close + 2
+        elif anchor.start() >= 5 and text.startswith("Input", anchor.start() - 5):
+            # Input="{...}", every payload is picked up
+            if text.find('}"', start + 1, line_end) != -1:
+                object_spans.append((start, line_end))
+
+    if len(arrays) > 1:
+        return "double_array", arrays
+    if arrays:
+        return "array", arrays
+    if object_spans:
+        return "object", object_spans
+    # Fallback: from the first bracket, the payload may still be escaped at this point
+    fallback_start = min(pos for pos in (text.find('{'), text.find('['), len(text)) if pos != -1)
+    if fallback_start < len(text):
+        return "fallback", [(fallback_start, len(text))]
+    return None, []
+
+
 def create_excel(data, headers, file_name):
     """
     Create an Excel file from the given data and headers.
@@ -39,52 +209,53 @@ def process_input(input_text):
     """
     Process the input text and extract data based on JSON array or object patterns.
     """
-    array_pattern = r'="(\[.*?\])"'
-    object_pattern = r'Input="({.*})"'
-
-    array_matches = re.findall(array_pattern, input_text)
-    object_match = re.search(object_pattern, input_text)
+    kind, spans = classify_input(input_text)
 
-    if array_matches and len(array_matches) > 1:
+    if kind == "double_array":
         # Process both arrays (value and regex)
-        arrays = [json.loads(bytes(match, "utf-8").decode("unicode_escape"))
-                  for match in array_matches]
+        arrays = [load_payload(input_text, start, end) for start, end in spans]
         headers = ["Value", "Regex"]
         data = zip(arrays[0], arrays[1])  # Pair values and regex
         return headers, data
-    elif array_matches:
+    elif kind == "array":
         # Single array found
-        json_str = bytes(array_matches[0], "utf-8").decode("unicode_escape")
-        data = [[value] for value in json.loads(json_str)]
+        start, end = spans[0]
+        data = [[value] for value in load_payload(input_text, start, end)]
         headers = ["Values"]
         return headers, data
-    elif object_match:
-        json_str = bytes(object_match.group(
-            1), "utf-8").decode("unicode_escape")
-        data = json.loads(json_str)
-        if isinstance(data, dict) and "Commands" in data:
-            commands = data["Commands"]
-            headers = list(commands[0].keys())
-            data = [[cmd.get(header, "") for header in headers]
-                    for cmd in commands]
+    elif kind == "object":
+        # Commands entries are parsed one by one while create_excel() writes the rows
+        commands = (cmd for start, end in spans
+                    for cmd in iter_commands(*unescape_json(input_text, start, end)))
+        first_cmd = next(commands, None)
+        if first_cmd is not None:
+            headers = list(first_cmd.keys())
+            data = ([cmd.get(header, "") for header in headers]
+                    for cmd in itertools.chain([first_cmd], commands))
             return headers, data
         else:
             raise ValueError("Unsupported JSON structure.")
-    else:
-        fallback_match = re.search(r'(\{.*\}|\[.*\])', input_text)
-        if fallback_match:
-            json_str = bytes(fallback_match.group(
-                1), "utf-8").decode("unicode_escape")
-            data = json.loads(json_str)
-            if isinstance(data, list):
-                headers = ["Values"]
-                data = [[value] for value in data]
-                return headers, data
-            else:
-                raise ValueError("Unsupported JSON structure.")
-        else:
+    elif kind == "fallback":
+        start, end = spans[0]
+        json_str, pos = unescape_json(input_text, start, end)
+        # Every JSON array embedded in the input, in order
+        found = False
+        data = []
+        for document, _, _ in iter_json_documents(json_str, pos):
+            found = True
+            if isinstance(document, list):
+                data.extend([value] for value in document)
+        if not found:
             raise ValueError(
                 "No valid JSON array or object found in the input string")
+        if data:
+            headers = ["Values"]
+            return headers, data
+        else:
+            raise ValueError("Unsupported JSON structure.")
+    else:
+        raise ValueError(
+            "No valid JSON array or object found in the input string")
 
 
 def main():
@@ -0,0 +1,74 @@
+import argparse
+import ast
+import json
+import random
+import time
+
+from data_to_pdf import clean_and_parse, scan_string_list
+
+VALUES = ["any", "TEST RULE 1 - VP3", "Zones Test", "application-default", "10.0.0.0/8", "trust",
+          "it's"]
+
+
+def make_values(count, seed=1):
+    """
+    Bracketed values as clean_and_parse() sees them: flat lists of four quoted strings, double
+    quoted as in the XSOAR context dumps, with one in ten single quoted as Python prints them.
+    """
+    # Reproducible test data, not used for anything security related
+    rng = random.Random(seed)  # nosec B311
+    values = []
+    for _ in range(count):
+        items = [rng.choice(VALUES[:-1]) for _ in range(4)]
+        if rng.random() < 0.1:
+            values.append(str(items + [VALUES[-1]]))
+        else:
+            values.append(json.dumps(items))
+    return values
+
+
+def json_loads(value):
+    """
+    json.loads, with None for values that are not JSON.
+    """
+    try:
+        return json.loads(value)
+    except ValueError:
+        return None
+
+
+def bench_values(count):
+    """
+    Time each parser on the same values and compare the results with ast.literal_eval.
+    """
+    values = make_values(count)
+    start = time.perf_counter()
+    expected = [ast.literal_eval(value) for value in values]
+    print(f"{count} bracketed values")
+    print(f"  {'ast.literal_eval':<18} {time.perf_counter() - start:>7.2f} s")
+    for name, func in (("json.loads", json_loads), ("scan_string_list", scan_string_list),
+                       ("clean_and_parse", clean_and_parse)):
+        start = time.perf_counter()
+        results = [func(value) for value in values]
+        elapsed = time.perf_counter() - start
+        # json.loads cannot read the single-quoted lists, those are left out of the comparison
+        same = all(result == want for result, want in zip(results, expected) if result is not None)
+        parsed = sum(result is not None for result in results)
+        print(f"  {name:<18} {elapsed:>7.2f} s  same={same}  parsed {parsed}/{count}")
+
+
+def main():
+    """
+    Run the benchmarks.
+    """
+    parser = argparse.ArgumentParser(
+        description="Time ast.literal_eval, json.loads, the string list scanner and "
+                    "clean_and_parse() on bracketed values.")
+    parser.add_argument("--lines", type=int, default=1000000,
+                        help="number of bracketed values (default: 1000000)")
+    args = parser.parse_args()
+    bench_values(args.lines)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import random
+import sys
+import time
+
+from data_to_pdf import create_text_pdf
+
+# Table sizes to render, override them on the command line: python bench_pdf.py 1000 50000
+SIZES = [1000, 5000, 10000, 50000, 100000, 200000]
+WORDS = ["TEST RULE", "VP3", "Zones Test", "any", "Service Test", "URL Test", "application-default",
+         "Address Test", "untrust", "trust"]
+
+
+def make_rows(count, seed=1):
+    """
+    Yield count rows shaped like the rule exports: a rule name and a list of values of varying
+    length, so that some rows wrap over several lines.
+    """
+    # Reproducible test data, not used for anything security related
+    rng = random.Random(seed)  # nosec B311
+    for i in range(count):
+        values = [rng.choice(WORDS) for _ in range(rng.randint(1, 30))]
+        yield [f"Rules where check {i} failed", str(values)]
+
+
+def main():
+    """
+    Render a table of every size and print the time per row.
+    """
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    print(f"{'rows':>8} {'seconds':>9} {'us/row':>8} {'bytes':>11}")
+    for count in sizes:
+        start = time.perf_counter()
+        pdf = create_text_pdf(make_rows(count), "bench.pdf")
+        elapsed = time.perf_counter() - start
+        print(f"{count:>8} {elapsed:>9.2f} {elapsed / count * 1e6:>8.1f} {len(pdf.getvalue()):>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+import argparse
+import importlib.util
+import json
+import os
+import random
+import re
+import time
+
+from data_to_excel import extract_rules
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# Pieces the generated extract_rules inputs are built from
+RULE_TOKENS = ["Rules ", "Rules where", "any", " value=", "value =", '"', "'", "[", "]", "=", "-",
+               ".", ",", "\\", " ", "\n", "x", "Rule", "[\"a\",\"b\"]", "'[\"c\"]'"]
+COMMAND_WORDS = ["show run", "set", "a\"b", "c\\d", "tab\there", "line\nbreak", "any", "x" * 20]
+# The fallback the JSON scripts used before iter_json_documents(): the first {...} or [...]
+GREEDY_PATTERN = re.compile(r'(\{.*\}|\[.*\])')
+
+
+def load_script(name):
+    """
+    Import a script from the Xsoar version folder (they only run main() under XSOAR).
+    """
+    path = os.path.join(HERE, "Xsoar version", name)
+    spec = importlib.util.spec_from_file_location(name[:-3], path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def regex_extract_rules(text):
+    """
+    extract_rules() from data_to_excel.py before the single-pass scanners.
+    """
+    extracted = []
+    pattern_value = r'(?:"([^"]+)"|(\bRules[^\s=:-]+.*?))\s+value\s*=\s*(?:"|\')\[(.*?)\](?:"|\')'
+    pattern_list = r'(Rules.*?)(?:=|-)\s*\[(.*?)\]'
+    pattern_single = r'(Rules.*?)(?:-|\.)(?!\s*\[)(.*?)(?=(?:Rules|$))'
+    for match in re.finditer(pattern_value, text, re.DOTALL):
+        rule_desc = match.group(1) or match.group(2)
+        values = match.group(3).replace('\\', '')
+        result = ', '.join([v.strip().strip('"').strip("'") for v in values.split(',')])
+        extracted.append([rule_desc.strip(), result])
+    text = re.sub(pattern_value, '', text, flags=re.DOTALL)
+    for match in re.finditer(pattern_list, text, re.DOTALL):
+        rule_desc = match.group(1).strip().rstrip('= -').strip()
+        values = match.group(2).replace('\\', '')
+        result = ', '.join([v.strip().strip('"').strip("'") for v in values.split(',')])
+        extracted.append([rule_desc, result])
+    text_cleaned = re.sub(pattern_list, '', text, flags=re.DOTALL)
+    for match in re.finditer(pattern_single, text_cleaned, re.DOTALL):
+        rule_desc = match.group(1).strip().rstrip('= -').strip()
+        value = match.group(2).strip().strip('.').strip()
+        if value:
+            extracted.append([rule_desc, value])
+    return extracted
+
+
+def regex_extract_list_rules(text):
+    """
+    extract_rules() from html_to_excel_xsoar.py before the single-pass scanners.
+    """
+    pattern_list = r'(Rules.*?)(?:=|-)\s*\[(.*?)\]'
+    pattern_single = r'(Rules.*?)(?:-|\.)(?!\s*\[)(.*?)(?=(?:Rules|$))'
+    extracted = []
+    for match in re.finditer(pattern_list, text, re.DOTALL):
+        rule_desc = match.group(1).strip().rstrip('= -').strip()
+        values = match.group(2)
+        result = ', '.join([v.strip().strip('"').strip("'") for v in values.split(',')])
+        extracted.append([rule_desc, result])
+    text_cleaned = re.sub(pattern_list, '', text, flags=re.DOTALL)
+    for match in re.finditer(pattern_single, text_cleaned, re.DOTALL):
+        rule_desc = match.group(1).strip().rstrip('= -').strip()
+        value = match.group(2).strip().strip('.').strip()
+        if value:
+            extracted.append([rule_desc, value])
+    return extracted
+
+
+def unicode_escape_payload(text, start, end):
+    """
+    How the JSON scripts decoded a payload before unescape_json().
+    """
+    return json.loads(bytes(text[start:end], "utf-8").decode("unicode_escape"))
+
+
+def make_commands(rng, count):
+    """
+    Commands entries with quotes, backslashes, tabs and newlines in their strings.
+    """
+    return [{"Command": rng.choice(COMMAND_WORDS),
+             "Output": [rng.choice(COMMAND_WORDS) for _ in range(3)],
+             "Count": rng.randint(0, 99)} for _ in range(count)]
+
+
+def escaped_argument(doc, ensure_ascii=True):
+    """
+    The document as a quoted XSOAR argument: Input="{\\"Commands\\": ...}"
+    """
+    payload = json.dumps(json.dumps(doc, ensure_ascii=ensure_ascii), ensure_ascii=ensure_ascii)
+    return 'Input="' + payload[1:-1] + '"'
+
+
+def timed(func, *args):
+    """
+    Return (func(*args), seconds).
+    """
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def rule_parsers():
+    """
+    (name, scanner, regex version) for every extract_rules() that is checked.
+    """
+    html_xsoar = load_script("html_to_excel_xsoar.py")
+    return [("data_to_excel", extract_rules, regex_extract_rules),
+            ("html_to_excel_xsoar", html_xsoar.extract_rules, regex_extract_list_rules)]
+
+
+def check_rules(cases, rng):
+    """
+    Compare each extract_rules() with its regex version on generated inputs.
+    """
+    for name, new, old in rule_parsers():
+        mismatches = 0
+        for _ in range(cases):
+            text = "".join(rng.choice(RULE_TOKENS) for _ in range(rng.randint(1, 40)))
+            if new(text) != old(text):
+                mismatches += 1
+                if mismatches <= 3:
+                    print(f"  mismatch: {text!r}")
+        print(f"extract_rules {name}: {cases} generated inputs, {mismatches} mismatches")
+
+
+def time_rules(size_mb):
+    """
+    Compare and time each extract_rules() with its regex version on text_data.txt scaled up.
+    """
+    with open(os.path.join(HERE, "text_data.txt"), encoding="utf-8") as f:
+        sample = f.read().strip() + " "
+    text = sample * max(size_mb * 1024 * 1024 // len(sample), 1)
+    for name, new, old in rule_parsers():
+        new_rows, new_time = timed(new, text)
+        old_rows, old_time = timed(old, text)
+        print(f"extract_rules {name}: text_data.txt x {len(text) / 1e6:.0f} MB, "
+              f"{len(new_rows)} rows, same={new_rows == old_rows}, "
+              f"regex {old_time:.2f} s, scanner {new_time:.2f} s")
+
+
+def check_unescape(json_xsoar, cases, rng):
+    """
+    Compare load_payload() with the unicode_escape path on escaped arguments, where both must
+    give the document back, and on plain JSON, where the old path broke the JSON escapes.
+    """
+    escaped_mismatches = plain_mismatches = plain_old_failures = 0
+    for _ in range(cases):
+        doc = {"Commands": make_commands(rng, rng.randint(0, 5))}
+        text = escaped_argument(doc)
+        start = text.index("{")
+        if (json_xsoar.load_payload(text, start, len(text)) != doc
+                or unicode_escape_payload(text, start, len(text) - 1) != doc):
+            escaped_mismatches += 1
+        text = "Input=" + json.dumps(doc)
+        start = text.index("{")
+        if json_xsoar.load_payload(text, start, len(text)) != doc:
+            plain_mismatches += 1
+        try:
+            old_ok = unicode_escape_payload(text, start, len(text)) == doc
+        except ValueError:
+            old_ok = False
+        plain_old_failures += not old_ok
+    print(f"unescape_json: {cases} escaped payloads, {escaped_mismatches} mismatches; "
+          f"{cases} plain payloads, {plain_mismatches} wrong "
+          f"(old path: {plain_old_failures} wrong)")
+
+    # Non-ASCII text was read as Latin-1 by the old path
+    text = escaped_argument({"Commands": [{"Output": "café"}]}, ensure_ascii=False)
+    start = text.index("{")
+    new = json_xsoar.load_payload(text, start, len(text))
+    old = unicode_escape_payload(text, start, len(text) - 1)
+    print(f"unescape_json: non-ASCII {new['Commands'][0]['Output']!r}, "
+          f"old path {old['Commands'][0]['Output']!r}")
+
+
+def time_unescape(json_xsoar, size_mb, rng):
+    """
+    Compare and time load_payload() with the unicode_escape path on a large escaped payload.
+    """
+    block = make_commands(rng, 1000)
+    repeat = max(size_mb * 1024 * 1024 // len(escaped_argument({"Commands": block})), 1)
+    text = escaped_argument({"Commands": block * repeat})
+    start = text.index("{")
+    new, new_time = timed(json_xsoar.load_payload, text, start, len(text))
+    old, old_time = timed(unicode_escape_payload, text, start, len(text) - 1)
+    print(f"unescape_json: {len(text) / 1e6:.0f} MB escaped payload, same={new == old}, "
+          f"unicode_escape {old_time:.2f} s, unescape_json {new_time:.2f} s")
+
+
+def time_documents(json_xsoar):
+    """
+    Time iter_json_documents() and the greedy regex fallback on an array after log text
+    containing stray braces, and on an array followed by text with brackets.
+    """
+    values = [f"value {i}" for i in range(20000)]
+    array = json.dumps(values)
+    cases = [("array after 220 KB of log text", "log {entry " * 20000 + array + "\n"),
+             ("array followed by text with brackets", array + " see [1] and [2]\n")]
+    for name, text in cases:
+        start = time.perf_counter()
+        documents = [document for document, _, _ in json_xsoar.iter_json_documents(text)]
+        new_time = time.perf_counter() - start
+        start = time.perf_counter()
+        try:
+            old = json.loads(GREEDY_PATTERN.search(text).group(1)) == values
+        except json.JSONDecodeError as e:
+            old = f"error: {e.msg}"
+        old_time = time.perf_counter() - start
+        print(f"iter_json_documents: {name}: {new_time:.3f} s (array found: "
+              f"{values in documents}), greedy regex {old_time:.3f} s "
+              f"(array found: {old})")
+
+
+def main():
+    """
+    Run the differential checks, then the timings on scaled-up inputs.
+    """
+    parser = argparse.ArgumentParser(
+        description="Compare extract_rules() and unescape_json() with the regex and unicode_escape "
+                    "versions they replaced, on generated inputs and on scaled-up inputs, and "
+                    "iter_json_documents() with the greedy regex fallback.")
+    parser.add_argument("--cases", type=int, default=20000,
+                        help="generated inputs per differential check (default: 20000)")
+    parser.add_argument("--size-mb", type=int, default=100,
+                        help="size of the scaled-up inputs in MB (default: 100)")
+    parser.add_argument("--seed", type=int, default=1, help="random seed (default: 1)")
+    args = parser.parse_args()
+    # Reproducible test data, not used for anything security related
+    rng = random.Random(args.seed)  # nosec B311
+    json_xsoar = load_script("json_to_excel_xsoar.py")
+    check_rules(args.cases, rng)
+    check_unescape(json_xsoar, args.cases, rng)
+    time_rules(args.size_mb)
+    time_unescape(json_xsoar, args.size_mb, rng)
+    time_documents(json_xsoar)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,244 @@
 import os
 import re
 import sys
-from bs4 import BeautifulSoup
-import io
+from html.parser import HTMLParser
+import collections
+import itertools
+import math
 import xlsxwriter
 
 
+# A start tag, doctype or comment near the start of the input marks it as HTML
+HTML_TAG_PATTERN = re.compile(r'<(?:!doctype|!--|[a-zA-Z][\w:-]*[\s/>])', re.IGNORECASE)
+HTML_SNIFF_CHARS = 4096
+HTML_SPACES = " \n\t\f\r"
+# Elements that never have an end tag
+HTML_VOID_ELEMENTS = frozenset((
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "keygen", "link", "menuitem",
+    "meta", "param", "source", "track", "wbr", "basefont", "bgsound", "command", "frame",
+    "image", "isindex", "nextid", "spacer"))
+# A device prompt and the command typed at it, e.g. Switch(config)#int range f0/1 - 24 or
+# admin@PA-VM> show interface all
+CLI_PROMPT_PATTERN = re.compile(r'^([A-Za-z][\w.\-]*(?:@[\w.\-]+)?(?:\([\w\-]+\))?)([#>])\s*(.*)$')
+CLI_FILENAME_PATTERN = re.compile(r'[^\w\-]+')
+# Command workbooks are named cli_<command>.xlsx, so they never replace rules.xlsx or
+# interfaces.xlsx
+CLI_FILENAME_PREFIX = "cli_"
+# Template file by (platform, command), and compiled TextFSM parser by template file,
+# both filled on first use
+CLI_TEMPLATE_NAMES = {}
+TEXTFSM_PARSERS = {}
+# Templates whose commands keep their original workbook from extract_interface_table()
+# (interfaces.xlsx with the Method column, which the TextFSM template does not parse)
+LEGACY_CLI_TEMPLATES = frozenset(("cisco_ios_show_ip_interface_brief.textfsm",))
+# Outputs with at least this many rows are written in constant_memory mode
+LARGE_OUTPUT_ROWS = 50000
+# In constant_memory mode the column widths are measured on the first rows only
+WIDTH_SAMPLE_ROWS = 1000
+
+
 def read_stdin():
     # Read all input from stdin (no prompt)
     return sys.stdin.read()
 
 
 def is_html(text):
-    return bool(BeautifulSoup(text, "html.parser").find())
+    """Sniffs the start of the input for a tag instead of parsing the whole document."""
+    return HTML_TAG_PATTERN.search(text, 0, HTML_SNIFF_CHARS) is not None
+
+
+def _skip_spaces(text, pos):
+    """Returns the first position at or after pos that is not whitespace."""
+    length = len(text)
+    while pos < length and text[pos].isspace():
+        pos += 1
+    return pos
+
+
+def _join_values(values):
+    """Joins the items of a bracketed list as "a, b, c" without their quotes."""
+    return ', '.join([v.strip().strip('"').strip("'")
+                      for v in values.split(',')])
+
+
+def _scan_list_rules(text, unescape):
+    """
+    Finds the Rules ... =[...] and Rules ... - [...] entries in one pass.
+    Returns the entries and the text with them removed.
+    """
+    extracted = []
+    pieces = []
+    previous_end = 0
+    start = text.find("Rules")
+    while start != -1:
+        # The list opens at the first "[" preceded (ignoring whitespace) by "=" or "-"
+        bracket = text.find('[', start + 6)
+        while bracket != -1:
+            separator = bracket - 1
+            while text[separator].isspace():
+                separator -= 1
+            if text[separator] in "=-":
+                break
+            bracket = text.find('[', bracket + 1)
+        if bracket == -1:
+            break
+        close = text.find(']', bracket + 1)
+        if close == -1:
+            # No later list can be closed either
+            break
+
+        rule_desc = text[start:separator].strip().rstrip('= -').strip()
+        values = text[bracket + 1:close]
+        if unescape:
+            values = values.replace('\\', '')
+        extracted.append([rule_desc, _join_values(values)])
+
+        pieces.append(text[previous_end:start])
+        previous_end = close + 1
+        start = text.find("Rules", previous_end)
+
+    if not extracted:
+        return extracted, text
+    pieces.append(text[previous_end:])
+    return extracted, "".join(pieces)
+
+
+def _scan_single_rules(text):
+    """Finds the Rules ... - value and Rules ... . value entries in one pass."""
+    extracted = []
+    length = len(text)
+    # Next "-" and "." positions, kept between rules so that each is searched for once
+    dash = dot = -1
+    start = text.find("Rules")
+    while start != -1:
+        # The value starts after the first "-" or "." that does not open a list
+        position = start + 5
+        while True:
+            if dash != length and dash < position:
+                dash = text.find('-', position)
+                dash = length if dash == -1 else dash
+            if dot != length and dot < position:
+                dot = text.find('.', position)
+                dot = length if dot == -1 else dot
+            separator = min(dash, dot)
+            if separator == length:
+                return extracted
+            after = _skip_spaces(text, separator + 1)
+            if after == length or text[after] != '[':
+                break
+            position = separator + 1
+
+        # The value runs up to the next rule or the end of the text
+        end = text.find("Rules", separator + 1)
+        rule_desc = text[start:separator].strip().rstrip('= -').strip()
+        value = text[separator + 1:length if end == -1 else end].strip().strip('.').strip()
+        if value:
+            extracted.append([rule_desc, value])
+        start = end
+    return extracted
+
+
+def _value_list_start(text, pos):
+    """
+    Matches whitespace, value, =, a quote and [ at pos.
+    Returns the position after the "[" or -1.
+    """
+    length = len(text)
+    if pos >= length or not text[pos].isspace():
+        return -1
+    pos = _skip_spaces(text, pos)
+    if not text.startswith("value", pos):
+        return -1
+    pos = _skip_spaces(text, pos + 5)
+    if pos >= length or text[pos] != '=':
+        return -1
+    pos = _skip_spaces(text, pos + 1)
+    if not text.startswith(('"[', "'["), pos):
+        return -1
+    return pos + 2
+
+
+def _find_rules_word(text, pos):
+    """Finds the next "Rules" at or after pos that starts a word."""
+    start = text.find("Rules", pos)
+    while start > 0 and (text[start - 1].isalnum() or text[start - 1] == '_'):
+        start = text.find("Rules", start + 1)
+    return start
+
+
+def _scan_value_rules(text):
+    """
+    Finds the "Rules ..." value="[...]" and Rules ... value=["..."] entries in one pass.
+    Returns the entries and the text with them removed.
+    """
+    extracted = []
+    pieces = []
+    length = len(text)
+    previous_end = position = 0
+    quote = text.find('"')
+    rules = _find_rules_word(text, 0)
+    while quote != -1 or rules != -1:
+        if rules == -1 or quote != -1 and quote < rules:
+            # Quoted rule: "...", then value=
+            start = quote
+            desc_end = text.find('"', start + 1)
+            if desc_end == -1:
+                # Last quote in the text
+                quote = -1
+                continue
+            quote = desc_end
+            if desc_end == start + 1:
+                continue
+            list_start = _value_list_start(text, desc_end + 1)
+            if list_start == -1:
+                continue
+            rule_desc = text[start + 1:desc_end]
+        else:
+            # Unquoted rule: Rules followed by a word, then the first value= after it
+            start = rules
+            rules = _find_rules_word(text, start + 1)
+            word_end = start + 5
+            while word_end < length and not text[word_end].isspace() and text[word_end] not in "=:-":
+                word_end += 1
+            if word_end == start + 5:
+                continue
+            list_start = -1
+            value = text.find("value", word_end + 1)
+            while value != -1:
+                if text[value - 1].isspace():
+                    desc_end = value - 1
+                    while text[desc_end - 1].isspace():
+                        desc_end -= 1
+                    list_start = _value_list_start(text, desc_end)
+                    if list_start != -1:
+                        break
+                value = text.find("value", value + 1)
+            if list_start == -1:
+                # No later rule can have a value= list either
+                break
+            rule_desc = text[start:desc_end]
+
+        # The list ends at the first "]" followed by a quote
+        close = text.find(']', list_start)
+        while close != -1 and (close + 1 == length or text[close + 1] not in "\"'"):
+            close = text.find(']', close + 1)
+        if close == -1:
+            break
+
+        values = text[list_start:close].replace('\\', '')
+        extracted.append([rule_desc.strip(), _join_values(values)])
+
+        pieces.append(text[previous_end:start])
+        previous_end = position = close + 2
+        if quote != -1 and quote < position:
+            quote = text.find('"', position)
+        if rules != -1 and rules < position:
+            rules = _find_rules_word(text, position)
+
+    if not extracted:
+        return extracted, text
+    pieces.append(text[previous_end:])
+    return extracted, "".join(pieces)
 
 
 def extract_rules(text):
@@ -25,56 +251,218 @@ def extract_rules(text):
       - Rules ... - ["...", "..."]
       - Rules ... - ... (plain text)
       - Rules ... . ... (plain text)
+    The text is read by a small tokenizer instead of regular expressions: each
+    stage walks its input once and passes on only what it did not consume.
     """
-    extracted = []
-
-    # Pattern for quoted or unquoted task and value
-    pattern_value = r'(?:"([^"]+)"|(\bRules[^\s=:-]+.*?))\s+value\s*=\s*(?:"|\')\[(.*?)\](?:"|\')'
-    # Pattern for unquoted list after = or -
-    pattern_list = r'(Rules.*?)(?:=|-)\s*\[(.*?)\]'
-    # Pattern for single value after dash or period
-    pattern_single = r'(Rules.*?)(?:-|\.)(?!\s*\[)(.*?)(?=(?:Rules|$))'
-
     # First, extract all rules with quoted or unquoted value=
-    for match in re.finditer(pattern_value, text, re.DOTALL):
-        rule_desc = match.group(1) or match.group(2)
-        values = match.group(3).replace('\\', '')
-        result = ', '.join([v.strip().strip('"').strip("'")
-                           for v in values.split(',')])
-        extracted.append([rule_desc.strip(), result])
-
-    # Remove already matched parts to avoid duplicates
-    text = re.sub(pattern_value, '', text, flags=re.DOTALL)
+    extracted, text = _scan_value_rules(text)
 
     # Then, extract all rules with lists (excluding value=)
-    for match in re.finditer(pattern_list, text, re.DOTALL):
-        rule_desc = match.group(1).strip().rstrip('= -').strip()
-        values = match.group(2).replace('\\', '')
-        result = ', '.join([v.strip().strip('"').strip("'")
-                           for v in values.split(',')])
-        extracted.append([rule_desc, result])
-
-    # Remove already matched parts to avoid duplicates
-    text_cleaned = re.sub(pattern_list, '', text, flags=re.DOTALL)
+    list_rules, text = _scan_list_rules(text, unescape=True)
+    extracted.extend(list_rules)
 
     # Now extract single-value rules (not followed by [ ... ])
-    for match in re.finditer(pattern_single, text_cleaned, re.DOTALL):
-        rule_desc = match.group(1).strip().rstrip('= -').strip()
-        value = match.group(2).strip().strip('.').strip()
-        if value:
-            extracted.append([rule_desc, value])
+    extracted.extend(_scan_single_rules(text))
 
     return extracted
 
 
-def extract_interface_table_from_html(html):
-    """Extracts interface table from Cisco CLI HTML output."""
-    soup = BeautifulSoup(html, "html.parser")
-    cli_div = soup.find("div", class_="cli-output")
-    if not cli_div:
-        return [], []
+class CliOutputParser(HTMLParser):
+    """
+    Collects the text of the first <div class="cli-output"> while the document streams
+    through html.parser, without building a tree. Only the names of the open elements are
+    kept, an end tag closes everything up to the matching start tag as BeautifulSoup does.
+    The text nodes are kept separately so that they can be joined like get_text(separator=...).
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.texts = []
+        # Whether each text node is inside <pre> or <textarea>, which keep their whitespace
+        self.preserved = []
+        self.found = False
+        self.done = False
+        # Names of the open elements, and how many were open outside the cli-output div
+        self.stack = []
+        self.outer = 0
+        # Void elements seen per name, a later </br> etc. is dropped as their redundant end tag
+        self.closed_void = collections.Counter()
+        # True while the current text node continues (it may arrive in several feed() chunks)
+        self.in_text = False
+
+    def handle_starttag(self, tag, attrs):
+        self.in_text = False
+        if tag in HTML_VOID_ELEMENTS:
+            self.closed_void[tag] += 1
+            return
+        if self.done:
+            return
+        if not self.found and tag == "div":
+            # A repeated attribute keeps its last value
+            classes = dict(attrs).get("class") or ""
+            if "cli-output" in classes.split():
+                self.found = True
+                self.outer = len(self.stack)
+        self.stack.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in HTML_VOID_ELEMENTS:
+            self.in_text = False
+            return
+        self.handle_starttag(tag, attrs)
+        self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if self.closed_void[tag]:
+            self.closed_void[tag] -= 1
+            return
+        self.in_text = False
+        if self.done or tag not in self.stack:
+            return
+        # Close the most recent element with this name and everything opened after it
+        del self.stack[len(self.stack) - 1 - self.stack[::-1].index(tag):]
+        if self.found and len(self.stack) <= self.outer:
+            self.done = True
+
+    def handle_data(self, data):
+        # Text inside <script> and <style> is not part of the output
+        if self.found and not self.done and self.stack[-1] not in ("script", "style"):
+            if self.in_text:
+                self.texts[-1] += data
+            else:
+                self.texts.append(data)
+                self.preserved.append("pre" in self.stack or "textarea" in self.stack)
+                self.in_text = True
+
+    def handle_comment(self, data):
+        self.in_text = False
+
+    def handle_decl(self, decl):
+        self.in_text = False
+
+    def handle_pi(self, data):
+        self.in_text = False
 
-    lines = cli_div.get_text(separator="\n").splitlines()
+
+def extract_cli_output_text(html, separator="\n", chunk_size=65536):
+    """Returns the text of the first div.cli-output, or None if there is none.
+    The HTML is fed in chunks and parsing stops once the div is closed."""
+    parser = CliOutputParser()
+    for pos in range(0, len(html), chunk_size):
+        parser.feed(html[pos:pos + chunk_size])
+        if parser.done:
+            break
+    else:
+        parser.close()
+    if not parser.found:
+        return None
+    # Like BeautifulSoup, a whitespace-only text node counts as a single newline or space
+    return separator.join(
+        text if keep or text.strip(HTML_SPACES) else ("\n" if "\n" in text else " ")
+        for text, keep in zip(parser.texts, parser.preserved))
+
+
+def split_cli_sessions(text, platform=None):
+    """
+    Lazily yields (platform, command, output) for every command typed at a prompt in captured
+    CLI text. Without a platform it is taken from the prompt: user@host> is PAN-OS, anything
+    else Cisco IOS.
+    """
+    session_platform = command = None
+    output = []
+    for line in text.replace('\xa0', ' ').splitlines():
+        match = CLI_PROMPT_PATTERN.match(line)
+        if match:
+            if command:
+                yield session_platform, command, "\n".join(output)
+            session_platform = platform or (
+                "paloalto_panos" if "@" in match.group(1) else "cisco_ios")
+            command = match.group(3).strip()
+            output = []
+        elif command:
+            output.append(line)
+    if command:
+        yield session_platform, command, "\n".join(output)
+
+
+def get_template_dir():
+    """Returns the ntc-templates folder with the index and the templates.
+    NTC_TEMPLATES_DIR overrides it as in ntc_templates.parse."""
+    template_dir = os.environ.get("NTC_TEMPLATES_DIR")
+    if not template_dir:
+        # Imported on first use, so rule exports work without ntc-templates installed
+        import ntc_templates
+        template_dir = os.path.join(os.path.dirname(ntc_templates.__file__), "templates")
+    return template_dir
+
+
+def get_cli_template(platform, command):
+    """Returns the ntc-templates template file for a command, or None if there is none.
+    Commands are matched against the ntc-templates index, abbreviations included."""
+    key = (platform, command)
+    if key not in CLI_TEMPLATE_NAMES:
+        # Imported on first use, so rule exports work without textfsm installed
+        from textfsm import clitable
+        index = clitable.CliTable("index", get_template_dir()).index
+        row = index.GetRowMatch({"Platform": platform, "Command": command})
+        # Row 0 is the header. clitable merges the results of commands with several
+        # templates, here the first one is used.
+        CLI_TEMPLATE_NAMES[key] = index.index[row]["Template"].split(":")[0] if row else None
+    return CLI_TEMPLATE_NAMES[key]
+
+
+def get_cli_parser(platform, command):
+    """Returns the compiled TextFSM parser for a command, or None if ntc-templates has none."""
+    template = get_cli_template(platform, command)
+    if template is None:
+        return None
+    parser = TEXTFSM_PARSERS.get(template)
+    if parser is None:
+        import textfsm
+        with open(os.path.join(get_template_dir(), template), encoding="utf-8") as f:
+            parser = textfsm.TextFSM(f)
+        TEXTFSM_PARSERS[template] = parser
+    return parser
+
+
+def _iter_cli_rows(parser, output):
+    """Parses one command output and yields its rows, with List values joined by ", "."""
+    parser.Reset()
+    for record in parser.ParseText(output):
+        yield [", ".join(value) if isinstance(value, list) else value for value in record]
+
+
+def iter_cli_tables(text, platform=None, exclude=()):
+    """
+    Lazily yields (command, headers, rows) for every command in captured CLI text that has a
+    TextFSM template, except commands whose template file is in exclude. rows is a generator,
+    the command output is parsed when it is first read.
+    """
+    for session_platform, command, output in split_cli_sessions(text, platform):
+        if get_cli_template(session_platform, command) in exclude:
+            continue
+        parser = get_cli_parser(session_platform, command)
+        if parser is not None:
+            yield command, list(parser.header), _iter_cli_rows(parser, output)
+
+
+def cli_workbook_name(command, used_names):
+    """Returns a workbook name for a command's table, cli_ followed by the command, with _2, _3...
+    added when the name is already in used_names (a repeated command). The name is added to
+    used_names."""
+    name = CLI_FILENAME_PREFIX + (CLI_FILENAME_PATTERN.sub("_", command).strip("_") or "command")
+    unique_name = name
+    count = 1
+    while unique_name in used_names:
+        count += 1
+        unique_name = f"{name}_{count}"
+    used_names.add(unique_name)
+    return unique_name
+
+
+def extract_interface_table(cli_text):
+    """Extracts the show ip interface brief table from captured Cisco CLI text."""
+    lines = cli_text.splitlines()
     table_start = None
     for idx, line in enumerate(lines):
         if line.strip().startswith("Interface"):
@@ -100,56 +488,97 @@ def extract_interface_table_from_html(html):
     return headers, data
 
 
-def create_text_excel(data, filename):
+class SheetWriter:
+    """
+    Writes rows to a new worksheet and tracks the width of each column in the same pass.
+    A column is as wide as its longest cell, or with width_percentile as the given percentile
+    of its cell lengths, so one huge cell does not make a huge column. With width_sample only
+    the first width_sample rows are measured. close() applies the widths, which xlsxwriter
+    allows after the cells are written, also in constant_memory mode.
+    """
+
+    def __init__(self, workbook, headers, header_format=None, width_sample=None, width_percentile=None):
+        self.worksheet = workbook.add_worksheet()
+        self.width_sample = width_sample
+        self.width_percentile = width_percentile
+        self.header_widths = [len(str(header)) for header in headers]
+        self.col_widths = list(self.header_widths)
+        # Percentile mode counts the cells of each length instead of keeping every length
+        self.length_counts = None
+        if width_percentile is not None:
+            self.length_counts = [collections.Counter() for _ in headers]
+        self.row = 0
+        self.worksheet.write_row(0, 0, headers, header_format)
+
+    def write_row(self, values, cell_format=None):
+        """Writes the next row and measures its cells."""
+        self.row += 1
+        self.worksheet.write_row(self.row, 0, values, cell_format)
+        if self.width_sample is not None and self.row > self.width_sample:
+            return
+        for col, value in enumerate(values):
+            cell_len = len(str(value))
+            if self.length_counts is not None:
+                self.length_counts[col][cell_len] += 1
+            elif cell_len > self.col_widths[col]:
+                self.col_widths[col] = cell_len
+
+    def _percentile_width(self, col):
+        """Returns the width_percentile (nearest rank) of the cell lengths of a column."""
+        counts = self.length_counts[col]
+        rank = math.ceil(sum(counts.values()) * self.width_percentile / 100)
+        seen = 0
+        for cell_len in sorted(counts):
+            seen += counts[cell_len]
+            if seen >= rank:
+                return cell_len
+        return 0
+
+    def close(self):
+        """Sets the column widths, with some padding for readability."""
+        if self.length_counts is not None:
+            for col in range(len(self.col_widths)):
+                self.col_widths[col] = max(self.header_widths[col], self._percentile_width(col))
+        for col, width in enumerate(self.col_widths):
+            self.worksheet.set_column(col, col, width + 2)
+
+
+def _open_workbook(filename, data, large=None):
+    """Opens the workbook on filename and returns (workbook, width_sample).
+
+    Large outputs (or data that is not a list) are written row by row in
+    constant_memory mode, with the column widths measured on the first
+    WIDTH_SAMPLE_ROWS rows only.
+    """
+    if large is None:
+        large = not isinstance(data, list) or len(data) >= LARGE_OUTPUT_ROWS
+    if not large:
+        return xlsxwriter.Workbook(filename, {'in_memory': True}), None
+    return xlsxwriter.Workbook(filename, {'constant_memory': True}), WIDTH_SAMPLE_ROWS
+
+
+def create_text_excel(data, filename, large=None, width_percentile=None):
     """Excel generation for plain text rules with auto-fit columns."""
-    output = io.BytesIO()
-    workbook = xlsxwriter.Workbook(output, {'in_memory': True})
-    worksheet = workbook.add_worksheet()
+    workbook, width_sample = _open_workbook(filename, data, large)
 
     # Centered bold header format
     bold_center = workbook.add_format(
         {'bold': True, 'align': 'center', 'valign': 'vcenter'})
 
-    # Prepare headers and combine with data for width calculation
-    headers = ["Tasks", "Results"]
-    all_rows = [headers] + data
-
-    # Calculate max width for each column
-    col_widths = [0, 0]
-    for row in all_rows:
-        for col, cell in enumerate(row):
-            cell_len = len(str(cell))
-            if cell_len > col_widths[col]:
-                col_widths[col] = cell_len
-
-    # Add some padding for readability
-    col_widths = [w + 2 for w in col_widths]
-
-    # Set column widths
-    worksheet.set_column(0, 0, col_widths[0])
-    worksheet.set_column(1, 1, col_widths[1])
-
-    # Write headers
-    worksheet.write(0, 0, headers[0], bold_center)
-    worksheet.write(0, 1, headers[1], bold_center)
-
-    # Write data
-    for i, row in enumerate(data, start=1):
-        worksheet.write_row(i, 0, row)
+    # Headers first, then data in row order as constant_memory mode requires
+    sheet = SheetWriter(workbook, ["Tasks", "Results"], bold_center,
+                        width_sample, width_percentile)
+    for row in data:
+        sheet.write_row(row)
 
+    sheet.close()
     workbook.close()
-    output.seek(0)
-
-    with open(filename, 'wb') as f:
-        f.write(output.read())
     print(f"[Local Dev] Saved file: {filename}")
 
 
-def create_html_excel(data, headers, filename):
+def create_html_excel(data, headers, filename, large=None, width_percentile=None):
     """Excel generation for HTML-extracted interface tables with row coloring and auto-fit columns."""
-    output = io.BytesIO()
-    workbook = xlsxwriter.Workbook(output, {'in_memory': True})
-    worksheet = workbook.add_worksheet()
+    workbook, width_sample = _open_workbook(filename, data, large)
 
     bold = workbook.add_format({'bold': True})
     green_fill = workbook.add_format(
@@ -158,36 +587,16 @@ def create_html_excel(data, headers, filename):
         {'bg_color': '#FFC7CE', 'font_color': '#000000'})
     normal = workbook.add_format({'font_color': '#000000'})
 
-    # Combine headers and data for width calculation
-    all_rows = [headers] + data
-
-    # Calculate max width for each column
-    col_widths = [0] * len(headers)
-    for row in all_rows:
-        for col, cell in enumerate(row):
-            cell_len = len(str(cell))
-            if cell_len > col_widths[col]:
-                col_widths[col] = cell_len
-
-    # Add some padding for readability
-    col_widths = [w + 2 for w in col_widths]
+    sheet = SheetWriter(workbook, headers, bold, width_sample, width_percentile)
 
-    # Set column widths
-    for col, width in enumerate(col_widths):
-        worksheet.set_column(col, col, width)
-
-    # Write headers
-    for col, header in enumerate(headers):
-        worksheet.write(0, col, header, bold)
-
-    # Find the index of the "Status" column
+    # Find the index of the "Status" column (TextFSM headers are upper case)
     try:
-        status_idx = headers.index('Status')
+        status_idx = [str(header).lower() for header in headers].index('status')
     except ValueError:
         status_idx = -1
 
     # Write data with row-based conditional formatting
-    for row_num, row_data in enumerate(data, start=1):
+    for row_data in data:
         row_format = normal
         if status_idx != -1:
             status_value = str(row_data[status_idx]).lower()
@@ -195,14 +604,10 @@ def create_html_excel(data, headers, filename):
                 row_format = green_fill
             elif status_value == 'down':
                 row_format = red_fill
-        for col, value in enumerate(row_data):
-            worksheet.write(row_num, col, value, row_format)
+        sheet.write_row(row_data, row_format)
 
+    sheet.close()
     workbook.close()
-    output.seek(0)
-
-    with open(filename, 'wb') as f:
-        f.write(output.read())
     print(f"[Local Dev] Saved file: {filename}")
 
 
@@ -224,14 +629,27 @@ def main():
         os.makedirs(downloads_folder, exist_ok=True)
 
         if is_html(input_text):
-            headers, data = extract_interface_table_from_html(input_text)
+            cli_text = extract_cli_output_text(input_text) or ""
+            tables = 0
+            headers, data = extract_interface_table(cli_text)
             if data:
                 headers = ["Interface", "IP-Address",
                            "Method", "Status", "Protocol"]
                 filename = os.path.join(downloads_folder, "interfaces.xlsx")
                 # filename = "interfaces.xlsx"
                 create_html_excel(data, headers, filename)
-            else:
+                tables += 1
+            # Every other command output with a TextFSM template is streamed into its own workbook
+            used_names = set()
+            for command, headers, rows in iter_cli_tables(cli_text, exclude=LEGACY_CLI_TEMPLATES):
+                first_row = next(rows, None)
+                if first_row is None:
+                    continue
+                name = cli_workbook_name(command, used_names)
+                filename = os.path.join(downloads_folder, f"{name}.xlsx")
+                create_html_excel(itertools.chain([first_row], rows), headers, filename)
+                tables += 1
+            if not tables:
                 print("No interface table found in HTML.")
         else:
             rules = extract_rules(input_text)
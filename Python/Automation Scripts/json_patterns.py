@@ -0,0 +1,111 @@
+import re
+
+
+# Compiled once: the start of a quoted JSON array or object argument, e.g. value="[ or Input="{.
+# Shared by the local json_to_* scripts, the XSOAR versions keep their own copy as they have to
+# be self-contained.
+ANCHOR_PATTERN = re.compile(r'="[\[{]')
+
+
+def classify_excel_input(text):
+    """
+    Scan the input once and classify it for json_to_excel.py.
+    Returns (kind, spans) where kind is "double_array", "array", "object", "fallback" or None
+    and spans are the (start, end) positions of the JSON text in the input. Object and fallback
+    spans run to the end of the line or input, the documents in them end at their own closing
+    bracket (see iter_json_documents()).
+    """
+    arrays = []
+    object_spans = []
+    array_end = 0
+    line_end = -1
+    for anchor in ANCHOR_PATTERN.finditer(text):
+        start = anchor.end() - 1
+        if start > line_end:
+            # Arrays and objects end on the line they start on
+            line_end = text.find('\n', start)
+            if line_end == -1:
+                line_end = len(text)
+        if text[start] == '[':
+            # ="[...]", up to the first ]" (arrays do not overlap)
+            if anchor.start() >= array_end:
+                close = text.find(']"', start + 1, line_end)
+                if close != -1:
+                    arrays.append((start, close + 1))
+                    array_end = close + 2
+        elif anchor.start() >= 5 and text.startswith("Input", anchor.start() - 5):
+            # Input="{...}", every payload is picked up
+            if text.find('}"', start + 1, line_end) != -1:
+                object_spans.append((start, line_end))
+
+    if len(arrays) > 1:
+        return "double_array", arrays
+    if arrays:
+        return "array", arrays
+    if object_spans:
+        return "object", object_spans
+    # Fallback: from the first bracket, the payload may still be escaped at this point
+    fallback_start = min(pos for pos in (text.find('{'), text.find('['), len(text)) if pos != -1)
+    if fallback_start < len(text):
+        return "fallback", [(fallback_start, len(text))]
+    return None, []
+
+
+def classify_pdf_input(text):
+    """
+    Scan the input once and classify it for json_to_pdf.py, which only reads Input="{...}"
+    payloads and value="[...]" arrays.
+    Returns (kind, spans) where kind is "object", "array", "regex_extract" or None and spans are
+    the (start, end) positions of the JSON text in the input. For "array" the span of the quoted
+    label comes first. Object spans run to the end of the line, the objects in them end at their
+    own closing bracket.
+    """
+    object_spans = []
+    array_spans = None
+    regex_extract_span = None
+    line_end = -1
+    for anchor in ANCHOR_PATTERN.finditer(text):
+        start = anchor.end() - 1
+        # Objects are only read from Input="{, arrays only from value="[
+        name = "Input" if text[start] == '{' else "value"
+        name_start = anchor.start() - len(name)
+        if name_start < 0 or not text.startswith(name, name_start):
+            continue
+        if start > line_end:
+            # Arrays and objects end on the line they start on
+            line_end = text.find('\n', start)
+            if line_end == -1:
+                line_end = len(text)
+        if text[start] == '{':
+            # Input="{...}", every payload is picked up
+            if text.find('}"', start + 1, line_end) != -1:
+                object_spans.append((start, line_end))
+            continue
+        if array_spans and regex_extract_span:
+            continue
+
+        # value="[...]", up to the first ]", preceded by whitespace
+        close = text.find(']"', start + 1, line_end)
+        value_start = name_start
+        gap = value_start
+        while gap > 0 and text[gap - 1].isspace():
+            gap -= 1
+        if close == -1 or gap == value_start:
+            continue
+        span = (start, close + 1)
+        if regex_extract_span is None and gap >= 16 and text.startswith("!RegexExtractAll", gap - 16):
+            regex_extract_span = span
+        elif array_spans is None and gap > 0 and text[gap - 1] == '"':
+            # "label" value="[...]", the label starts at the first quote on its line
+            label_end = gap
+            label_start = text.find('"', text.rfind('\n', 0, label_end - 1) + 1, label_end - 1)
+            if label_start != -1:
+                array_spans = [(label_start, label_end), span]
+
+    if object_spans:
+        return "object", object_spans
+    if array_spans:
+        return "array", array_spans
+    if regex_extract_span:
+        return "regex_extract", [regex_extract_span]
+    return None, []
@@ -3,109 +3,221 @@ import xlsxwriter
 import re
 import sys
 
+from data_to_excel import SheetWriter
+from json_patterns import classify_excel_input
+
+
+# Compiled once: the start of an embedded JSON object or array. The first token is checked too,
+# so that prose such as {entry or [2024-01-01 12:00] is not handed to the decoder
+JSON_START_PATTERN = re.compile(
+    r'\{\s*["}]|\[\s*(?:[\]\[{"]|-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\s*[,\]]|true|false|null)')
+JSON_DECODER = json.JSONDecoder()
+# One level of backslash escaping, as in Input="{\"Commands\": ...}"
+ESCAPE_PATTERN = re.compile(r'\\(u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|[0-7]{1,3}|.)', re.DOTALL)
+ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f", "a": "\a", "v": "\v",
+           '"': '"', "'": "'", "\\": "\\", "\n": ""}
+# JSON whitespace, as skipped by the json module between tokens
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+# Rows are written in order and flushed as they go, so the sheet is never held in memory.
+# Column widths are tracked while writing and applied just before close.
+WORKBOOK_OPTIONS = {'constant_memory': True}
+
+
+def iter_json_documents(text, pos=0):
+    """
+    Lazily yield (document, start, end) for every JSON object or array embedded in the text.
+    JSONDecoder.raw_decode reads each document up to its own closing bracket and the search
+    resumes right after it, so text between or after the documents is never rescanned.
+    """
+    while True:
+        match = JSON_START_PATTERN.search(text, pos)
+        if match is None:
+            return
+        try:
+            document, end = JSON_DECODER.raw_decode(text, match.start())
+        except ValueError:
+            # Not JSON (or not a complete document), try the next bracket
+            pos = match.start() + 1
+            continue
+        yield document, match.start(), end
+        pos = end
+
+
+def _unescape_char(match):
+    """Decode one backslash escape matched by ESCAPE_PATTERN."""
+    code = match.group(1)
+    if code[0] in "ux" and len(code) > 1:
+        return chr(int(code[1:], 16))
+    if code[0] in "01234567":
+        return chr(int(code, 8))
+    return ESCAPES.get(code, match.group(0))
+
+
+def unescape_json(text, start=0, end=None):
+    """
+    Remove one level of backslash escaping from the JSON payload at text[start:end].
+    Returns (json_text, pos), the text holding the payload and the position where it starts.
+    Plain JSON (its first quote is not escaped) is neither copied nor decoded, the input text
+    itself is returned. An escaped payload is the content of a quoted argument, so it is decoded
+    in one pass by the C string scanner of the json module, up to the closing quote. Escapes
+    that JSON does not know fall back to a regex substitution. Unlike the unicode_escape codec,
+    non-ASCII text is kept as it is.
+    """
+    if end is None:
+        end = len(text)
+    quote = text.find('"', start, end)
+    if quote == -1:
+        escaped = text.find("\\", start, end) != -1
+    else:
+        escaped = quote > start and text[quote - 1] == "\\"
+    if not escaped:
+        return text, start
+    try:
+        return json.decoder.scanstring(text, start, False)[0], 0
+    except ValueError:
+        return ESCAPE_PATTERN.sub(_unescape_char, text[start:end]), 0
+
+
+def load_payload(text, start=0, end=None):
+    """Decode the JSON document at text[start:end], unescaping it first when needed."""
+    return JSON_DECODER.raw_decode(*unescape_json(text, start, end))[0]
+
+
+def iter_commands(text, pos=0):
+    """
+    Lazily yield the entries of the "Commands" array of the JSON object at text[pos:].
+    The object is walked key by key and every entry is decoded on its own with raw_decode, so
+    the array is never held in memory as a whole. The other values are decoded and dropped,
+    which still validates the rest of the document. Nothing is yielded when the payload is not
+    an object or has no Commands array.
+    """
+    skip = WHITESPACE.match
+    pos = skip(text, pos).end()
+    if text[pos:pos + 1] != '{':
+        return
+    pos = skip(text, pos + 1).end()
+    if text[pos:pos + 1] == '}':
+        return
+    while True:
+        if text[pos:pos + 1] != '"':
+            raise json.JSONDecodeError("Expecting property name enclosed in double quotes", text, pos)
+        key, pos = json.decoder.scanstring(text, pos + 1)
+        pos = skip(text, pos).end()
+        if text[pos:pos + 1] != ':':
+            raise json.JSONDecodeError("Expecting ':' delimiter", text, pos)
+        pos = skip(text, pos + 1).end()
+
+        if key == "Commands" and text[pos:pos + 1] == '[':
+            pos = skip(text, pos + 1).end()
+            if text[pos:pos + 1] == ']':
+                pos += 1
+            else:
+                while True:
+                    command, pos = JSON_DECODER.raw_decode(text, pos)
+                    yield command
+                    pos = skip(text, pos).end()
+                    if text[pos:pos + 1] == ']':
+                        pos += 1
+                        break
+                    if text[pos:pos + 1] != ',':
+                        raise json.JSONDecodeError("Expecting ',' delimiter", text, pos)
+                    pos = skip(text, pos + 1).end()
+        else:
+            pos = JSON_DECODER.raw_decode(text, pos)[1]
+
+        pos = skip(text, pos).end()
+        if text[pos:pos + 1] == '}':
+            return
+        if text[pos:pos + 1] != ',':
+            raise json.JSONDecodeError("Expecting ',' delimiter", text, pos)
+        pos = skip(text, pos + 1).end()
+
+
 try:
     # Read input from stdin
     raw_input = sys.stdin.read().strip()
 
-    # Try to extract JSON array or object using regex
-    array_pattern = r'="(\[.*?\])"'
-    object_pattern = r'Input="({.*})"'
+    # Find the JSON array(s) or object in a single scan
+    kind, spans = classify_excel_input(raw_input)
 
     json_str = None
 
-    array_matches = re.findall(array_pattern, raw_input)
-    object_match = re.search(object_pattern, raw_input)
-
-    if array_matches and len(array_matches) > 1:
+    if kind == "double_array":
         # Process both arrays (value and regex)
         arrays = []
-        for match in array_matches:
-            arr = json.loads(bytes(match, "utf-8").decode("unicode_escape"))
+        for start, end in spans:
+            arr = load_payload(raw_input, start, end)
             arrays.append(arr)
         # Write both arrays to Excel in separate columns
-        workbook = xlsxwriter.Workbook('rules_output.xlsx')
-        worksheet = workbook.add_worksheet()
+        workbook = xlsxwriter.Workbook('rules_output.xlsx', WORKBOOK_OPTIONS)
         header_format = workbook.add_format(
             {'bold': True, 'align': 'center', 'border': 1})
-        worksheet.write(0, 0, 'Value', header_format)
-        worksheet.write(0, 1, 'Regex', header_format)
+        sheet = SheetWriter(workbook, ['Value', 'Regex'], header_format)
         max_len = max(len(arrays[0]), len(arrays[1]))
-        max_widths = [len('Value'), len('Regex')]
         for row in range(max_len):
-            for col in range(2):
-                value = arrays[col][row] if row < len(arrays[col]) else ""
-                worksheet.write(row + 1, col, value)
-                max_widths[col] = max(max_widths[col], len(str(value)))
-        for col, width in enumerate(max_widths):
-            worksheet.set_column(col, col, width + 2)
+            sheet.write_row([arrays[col][row] if row < len(arrays[col]) else ""
+                             for col in range(2)])
+        sheet.close()
         workbook.close()
         print("Excel file 'rules_output.xlsx' has been created successfully.")
-    elif array_matches:
+    elif kind == "array":
         # Only one array found, process as before
-        json_str = array_matches[0]
-        json_str = bytes(json_str, "utf-8").decode("unicode_escape")
-        data = json.loads(json_str)
-        workbook = xlsxwriter.Workbook('rules_output.xlsx')
-        worksheet = workbook.add_worksheet()
+        start, end = spans[0]
+        data = load_payload(raw_input, start, end)
+        workbook = xlsxwriter.Workbook('rules_output.xlsx', WORKBOOK_OPTIONS)
         header_format = workbook.add_format(
             {'bold': True, 'align': 'center', 'border': 1})
-        worksheet.write(0, 0, 'Values', header_format)
-        max_width = len('Values')
-        for row, rule in enumerate(data, start=1):
-            value = str(rule)
-            worksheet.write(row, 0, value)
-            max_width = max(max_width, len(value))
-        worksheet.set_column(0, 0, max_width + 2)
+        sheet = SheetWriter(workbook, ['Values'], header_format)
+        for rule in data:
+            sheet.write_row([str(rule)])
+        sheet.close()
         workbook.close()
         print("Excel file 'rules_output.xlsx' has been created successfully.")
-    elif object_match:
-        json_str = object_match.group(1)
-        json_str = bytes(json_str, "utf-8").decode("unicode_escape")
-        data = json.loads(json_str)
-        if isinstance(data, dict) and "Commands" in data:
-            commands = data["Commands"]
-            workbook = xlsxwriter.Workbook('rules_output.xlsx')
-            worksheet = workbook.add_worksheet()
-            header_format = workbook.add_format(
-                {'bold': True, 'align': 'center', 'border': 1})
-            headers = list(commands[0].keys())
-            col_widths = [len(header) for header in headers]
-            for col, header in enumerate(headers):
-                worksheet.write(0, col, header, header_format)
-            for row, cmd in enumerate(commands, start=1):
-                for col, header in enumerate(headers):
-                    value = str(cmd.get(header, ""))
-                    worksheet.write(row, col, value)
-                    col_widths[col] = max(col_widths[col], len(value))
-            for col, width in enumerate(col_widths):
-                worksheet.set_column(col, col, width + 2)
+    elif kind == "object":
+        # Commands entries are parsed one by one and written as they are read
+        workbook = None
+        for start, end in spans:
+            json_str, pos = unescape_json(raw_input, start, end)
+            for cmd in iter_commands(json_str, pos):
+                if workbook is None:
+                    workbook = xlsxwriter.Workbook('rules_output.xlsx', WORKBOOK_OPTIONS)
+                    header_format = workbook.add_format(
+                        {'bold': True, 'align': 'center', 'border': 1})
+                    headers = list(cmd.keys())
+                    sheet = SheetWriter(workbook, headers, header_format)
+                sheet.write_row([str(cmd.get(header, "")) for header in headers])
+        if workbook is not None:
+            sheet.close()
             workbook.close()
             print("Excel file 'rules_output.xlsx' has been created successfully.")
         else:
             print("Unsupported JSON structure.")
-    else:
-        fallback_match = re.search(r'(\{.*\}|\[.*\])', raw_input)
-        if fallback_match:
-            json_str = fallback_match.group(1)
-            json_str = bytes(json_str, "utf-8").decode("unicode_escape")
-            data = json.loads(json_str)
-            if isinstance(data, list):
-                workbook = xlsxwriter.Workbook('rules_output.xlsx')
-                worksheet = workbook.add_worksheet()
+    elif kind == "fallback":
+        start, end = spans[0]
+        json_str, pos = unescape_json(raw_input, start, end)
+        # Every JSON array embedded in the input is written, in order
+        workbook = None
+        found = False
+        for data, _, _ in iter_json_documents(json_str, pos):
+            found = True
+            if not isinstance(data, list):
+                continue
+            if workbook is None:
+                workbook = xlsxwriter.Workbook('rules_output.xlsx', WORKBOOK_OPTIONS)
                 header_format = workbook.add_format(
                     {'bold': True, 'align': 'center', 'border': 1})
-                worksheet.write(0, 0, 'Values', header_format)
-                max_width = len('Values')
-                for row, rule in enumerate(data, start=1):
-                    value = str(rule)
-                    worksheet.write(row, 0, value)
-                    max_width = max(max_width, len(value))
-                worksheet.set_column(0, 0, max_width + 2)
-                workbook.close()
-                print("Excel file 'rules_output.xlsx' has been created successfully.")
-            else:
-                print("Unsupported JSON structure.")
+                sheet = SheetWriter(workbook, ['Values'], header_format)
+            for rule in data:
+                sheet.write_row([str(rule)])
+        if workbook is not None:
+            sheet.close()
+            workbook.close()
+            print("Excel file 'rules_output.xlsx' has been created successfully.")
+        elif found:
+            print("Unsupported JSON structure.")
         else:
             print("No valid JSON array or object found in the input string")
+    else:
+        print("No valid JSON array or object found in the input string")
 except Exception as e:
     print(f"An error occurred: {e}")
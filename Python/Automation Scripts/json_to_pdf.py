@@ -1,7 +1,17 @@
+import argparse
 import json
 import re
 import sys
 import io
+import zlib
+import collections
+import os
+import itertools
+import concurrent.futures
+# Only for pickle.PicklingError from the process pool, nothing is unpickled here
+import pickle  # nosec B403
+
+from json_patterns import classify_pdf_input
 
 
 class MinimalPDF:
@@ -13,11 +23,39 @@ class MinimalPDF:
     and rows with dynamic column widths. The generated PDF can be saved to a file or
     returned as a binary stream.
     It is suitable for generating simple PDF documents programmatically.
-    The PDF version is set to 1.4, and the class does not depend on any external 
-    libraries for PDF generation, making it lightweight and easy to use for basic 
+    The PDF version is 1.4, or 1.5 with set_object_streams(), and the class does not depend
+    on any external libraries for PDF generation, making it lightweight and easy to use for basic 
     PDF creation tasks.
     """
 
+    # Object numbers reserved for the document-level objects, page objects are numbered after these
+    INFO_OBJ = 1
+    FONT_OBJ = 2
+    PAGES_OBJ = 3
+    CATALOG_OBJ = 4
+    # Left padding in points so that first column text does not touch the left border
+    CELL_PADDING = 10
+    # Smallest batch of rows that render_table() spreads over worker processes
+    PARALLEL_MIN_ROWS = 5000
+    # Number of objects packed into each object stream in PDF 1.5 mode
+    OBJECTS_PER_STREAM = 100
+
+    # Helvetica glyph widths from the Adobe AFM metrics in 1/1000 em units, for the printable
+    # ASCII characters from space to tilde in StandardEncoding order
+    HELVETICA_WIDTHS = dict(zip(
+        (chr(code) for code in range(32, 127)),
+        (
+            278, 278, 355, 556, 556, 889, 667, 222, 333, 333, 389, 584, 278, 333, 278, 278,  # space - /
+            556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,  # 0 - ?
+            1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,  # @ - O
+            667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,  # P - _
+            222, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,  # ` - o
+            556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,  # p - ~
+        )
+    ))
+    # Width used for characters outside the table
+    DEFAULT_CHAR_WIDTH = 556
+
     def __init__(self, filename, page_width=595, page_height=842, margin=50):
         self.filename = filename
         self.page_width = page_width
@@ -25,11 +63,34 @@ class MinimalPDF:
         self.margin = margin
         self.objects = []
         self.pages = []
-        self.current_content = ""
+        self.current_content = []  # Chunks of the page being built
         self.y = page_height - margin
         self.font_size = 12
         self.leading = 16  # Line height
-        self.char_width = 7  # Approximate width for Helvetica 12pt
+        self.compress = True  # FlateDecode page content streams
+        self.compression_level = 6  # zlib level, 1 = fastest, 9 = smallest
+        self.page_count = 0  # Number of finished pages
+        self.stream = None  # Binary output stream in streaming mode
+        self.stream_offset = 0  # Bytes written to the output stream
+        self.xref_offsets = {}  # Object number -> byte offset
+        self.page_objs = []  # Object numbers of the written pages
+        self.finished = False  # True once output() has written the trailer
+        self.next_obj = self.CATALOG_OBJ + 1  # Next free object number
+        self.separator_style = "line"  # "line" (stroked paths) or "text" (underscores)
+        self.rule_paths = []  # Separator segments on the current page
+        self.page_template = None  # Shared page furniture content
+        self.template_obj = None  # Page furniture Form XObject number
+        self.template_top = None  # Content start below the template header
+        self.template_footer = False  # True when the template draws a footer line
+        self.object_streams = False  # PDF 1.5 object streams and xref stream
+        self.pending_objs = []  # Objects waiting for the next object stream
+        self.compressed_objs = {}  # Object number -> (object stream, index)
+        self.page_number_format = None  # Page number footer format
+        self.page_total = None  # Total pages for the page number footer
+        self.wrap_cache = collections.OrderedDict()  # LRU cache of wrap_text() results
+        self.wrap_cache_size = 4096  # Maximum wrap cache entries, 0 disables it
+        self.wrap_cache_hits = 0
+        self.wrap_cache_misses = 0
         self.metadata = self.generate_default_metadata()
 
     def generate_default_metadata(self):
@@ -86,6 +147,71 @@ class MinimalPDF:
         # Reset the vertical position based on the new margin
         self.y = self.page_height - margin
 
+    def set_page_numbers(self, total_pages, fmt="Page {page} of {total}"):
+        """
+        :description: Adds a page number footer, right-aligned below the bottom border, to every page
+            finished from now on. The total is usually taken from a LayoutPlan (see plan_table()).
+        :param total_pages: The total number of pages in the document.
+        :param fmt: Format of the footer, with {page} and {total} placeholders.
+        :return: None
+        :example:
+        plan = pdf.plan_table(rows, columns)
+        pdf.set_page_numbers(plan.page_count)
+        pdf.draw_plan(plan, columns)
+        """
+
+        self.page_number_format = fmt
+        self.page_total = total_pages
+
+    def set_separator_style(self, style):
+        """
+        :description: Sets how draw_separator draws the horizontal rules between table rows.
+            "line" (the default) draws stroked paths that are batched and stroked once per page,
+            "text" draws runs of underscore characters as in earlier versions.
+        :param style: Either "line" or "text".
+        :return: None
+        :example:
+        pdf.set_separator_style("text")
+        """
+
+        if style not in ("line", "text"):
+            raise ValueError(f"Separator style must be 'line' or 'text', got {style!r}")
+        self.separator_style = style
+
+    def set_object_streams(self, enabled=True):
+        """
+        :description: Enables PDF 1.5 output, where the page dictionaries and the document-level
+            objects are packed into compressed object streams and the classic xref table is replaced
+            by a compressed cross-reference stream. This makes large exports noticeably smaller.
+            Must be called before open_stream(), raises RuntimeError once the PDF header is written.
+        :param enabled: True for PDF 1.5 object streams, False for classic PDF 1.4 output.
+        :return: None
+        :example:
+        pdf.set_object_streams(True)
+        """
+
+        if self.stream_offset:
+            raise RuntimeError("set_object_streams() must be called before open_stream() or output()")
+        self.object_streams = enabled
+        self.metadata["PDFVersion"] = "1.5" if enabled else "1.4"
+
+    def set_compression(self, enabled=True, level=6):
+        """
+        :description: Enables or disables FlateDecode compression of the page content streams
+            and sets the zlib compression level. Compression is on by default; level 1 favours
+            speed and level 9 favours the smallest file for large reports.
+        :param enabled: True to compress content streams, False to write them uncompressed.
+        :param level: The zlib compression level from 1 (fastest) to 9 (smallest).
+        :return: None
+        :example:
+        pdf.set_compression(True, 9)
+        """
+
+        if not 1 <= level <= 9:
+            raise ValueError(f"Compression level must be between 1 and 9, got {level}")
+        self.compress = enabled
+        self.compression_level = level
+
     def get_usable_width(self):
         """
         :description: Calculates the usable width of the PDF page, which is the total
@@ -100,17 +226,19 @@ class MinimalPDF:
     def add_page(self):
         """
         :description: Adds a new page to the PDF document. This method resets the
-            current content and vertical position, and draws a border around the new page.
+            current content and vertical position, and draws a border around the new page
+            (or the page template, if one is set).
         :return: None
         :example:
         pdf.add_page()
         """
 
-        if self.current_content:
-            self.pages.append(self.current_content)
-            self.current_content = ""
+        self._flush_page()
 
         self.y = self.page_height - self.margin - self.leading
+        if self.template_top is not None:
+            # Start below the header drawn by the page template
+            self.y = self.template_top
         self.draw_page_border()
 
     def set_font(self, size):
@@ -125,7 +253,6 @@ class MinimalPDF:
 
         self.font_size = size
         self.leading = int(size * 1.3)
-        self.char_width = int(size * 0.6)
 
     def text(self, x, y, txt):
         """
@@ -138,12 +265,42 @@ class MinimalPDF:
         pdf.text(100, 200, "Hello, World!")
         """
 
-        self.current_content += f"BT /F1 {self.font_size} Tf {x} {y} Td ({self._escape(txt)}) Tj ET\n"
+        self.current_content.append(f"BT /F1 {self.font_size} Tf {x} {y} Td ({self._escape(txt)}) Tj ET\n")
+
+    def text_block(self, cells):
+        """
+        :description: Places several runs of text in a single text object. The font and leading
+            are set once, each run is positioned relative to the previous one with Td, or with
+            the ' operator when it starts one line below it, and empty runs are skipped. This
+            keeps table rows far smaller than one BT/ET block per cell.
+        :param cells: List of tuples [(x, y, txt), ...] with absolute positions, in drawing order.
+        :return: None
+        :example:
+        pdf.text_block([(50, 700, "Key"), (292, 700, " | "), (302, 700, "Value")])
+        """
+
+        parts = [f"BT /F1 {self.font_size} Tf {self.leading} TL\n"]
+        # Start of the current line in text space, the text matrix starts at the origin
+        line_x, line_y = 0, 0
+        for x, y, txt in cells:
+            if not txt:
+                continue
+            if len(parts) > 1 and x == line_x and y == line_y - self.leading:
+                # Next line at the same x: move down by the leading and show the text
+                parts.append(f"({self._escape(txt)}) '\n")
+            else:
+                parts.append(f"{x - line_x} {y - line_y} Td ({self._escape(txt)}) Tj\n")
+            line_x, line_y = x, y
+
+        if len(parts) > 1:
+            parts.append("ET\n")
+            self.current_content.append("".join(parts))
 
     def wrap_text(self, txt, max_width):
         """
         :description: Wraps text to fit within a specified width, breaking it
-            into lines based on word boundaries.
+            into lines based on word boundaries. Word widths are measured with the
+            Helvetica font metrics, each word once, and summed per line.
         :param txt: The text to be wrapped.
         :param max_width: The maximum width in points for each line of text.
         :return: A list of strings, each representing a line of wrapped text.
@@ -151,31 +308,116 @@ class MinimalPDF:
         wrapped_lines = pdf.wrap_text("This is a long text that needs to be wrapped.", 200) 
         """
 
-        max_chars = max(int(max_width // self.char_width), 1)
-        # 200 // 7 => 28 characters max per line. If division results in less than 1, set to 1.
+        # Repeated cell values ("any", zone names, rule names) are answered from the LRU cache
+        key = (txt, max_width, self.font_size)
+        cached = self.wrap_cache.get(key)
+        if cached is not None:
+            self.wrap_cache.move_to_end(key)
+            self.wrap_cache_hits += 1
+            return list(cached)
+        self.wrap_cache_misses += 1
+
+        lines = self._wrap_text(txt, max_width)
+        if self.wrap_cache_size > 0:
+            self.wrap_cache[key] = tuple(lines)
+            if len(self.wrap_cache) > self.wrap_cache_size:
+                # Drop the least recently used entry
+                self.wrap_cache.popitem(last=False)
+        return lines
+
+    def _wrap_text(self, txt, max_width):
+        """
+        :description: Wraps text without the cache, see wrap_text().
+        :param txt: The text to be wrapped.
+        :param max_width: The maximum width in points for each line of text.
+        :return: A list of strings, each representing a line of wrapped text.
+        :example:
+        wrapped_lines = pdf._wrap_text("This is a long text that needs to be wrapped.", 200)
+        """
+
+        # Measure in 1/1000 em font units so that line widths are plain integer sums,
+        # e.g. 200 points at 9pt => 200 * 1000 / 9 => 22222 units per line
+        max_units = max_width * 1000 / self.font_size
+        widths = self.HELVETICA_WIDTHS
+        default_width = self.DEFAULT_CHAR_WIDTH
+        space_width = widths[" "]
+
+        # Fast path: text that is already normalised (printable, single spaces, no leading or trailing
+        # space) and fits on one line is returned as is, without splitting it into words
+        if not txt:
+            return []
+        if (txt.isprintable() and txt[0] != " " and txt[-1] != " " and "  " not in txt
+                and sum(widths.get(ch, default_width) for ch in txt) <= max_units):
+            return [txt]
 
-        words = txt.split()
         lines = []
-        current = ""
-        for word in words:
-            if len(current) + len(word) + 1 > max_chars:
+        current = []
+        current_units = 0
+        for word in txt.split():
+            word_units = sum(widths.get(ch, default_width) for ch in word)
+            if current and current_units + space_width + word_units > max_units:
                 # If adding the next word + space exceeds the max width, save the current line
                 # and start a new line with the current word
-                if current:
-                    lines.append(current)
-                current = word
+                lines.append(" ".join(current))
+                current = [word]
+                current_units = word_units
+            elif current:
+                # If current line is not empty, add the word with a space
+                current.append(word)
+                current_units += space_width + word_units
             else:
-                if current:
-                    # If current line is not empty, add the word with a space
-                    current += " " + word
-                else:
-                    # If current line is empty, just set it to the word
-                    current = word
+                # If current line is empty, just set it to the word. A word wider than the line
+                # is kept whole on its own line
+                current = [word]
+                current_units = word_units
         if current:
             # If there's any remaining text in current, add it as the last line
-            lines.append(current)
+            lines.append(" ".join(current))
         return lines
 
+    def set_wrap_cache_size(self, size):
+        """
+        :description: Sets the maximum number of wrap_text() results kept in the LRU cache.
+        :param size: The number of entries, 0 disables the cache.
+        :return: None
+        :example:
+        pdf.set_wrap_cache_size(10000)
+        """
+
+        self.wrap_cache_size = size
+        while len(self.wrap_cache) > max(size, 0):
+            self.wrap_cache.popitem(last=False)
+
+    def wrap_cache_info(self):
+        """
+        :description: Reports the wrap cache statistics.
+        :return: A dictionary with the hits, misses, current size and maximum size of the cache.
+        :example:
+        print(pdf.wrap_cache_info())
+        """
+
+        return {
+            "hits": self.wrap_cache_hits,
+            "misses": self.wrap_cache_misses,
+            "size": len(self.wrap_cache),
+            "maxsize": self.wrap_cache_size,
+        }
+
+    def get_string_width(self, txt, size=None):
+        """
+        :description: Measures the width of a string in points using the Helvetica font metrics.
+        :param txt: The text to be measured.
+        :param size: The font size in points (default is the current font size).
+        :return: The width of the text in points.
+        :example:
+        width = pdf.get_string_width("Keys and Values", 16)
+        """
+
+        widths = self.HELVETICA_WIDTHS
+        default_width = self.DEFAULT_CHAR_WIDTH
+        units = sum(widths.get(ch, default_width) for ch in txt)
+        return units * (size or self.font_size) / 1000
+
     def draw_separator(self, columns, divider=" | "):
         """
         :description: Draws a horizontal separator line for each column in a table-like structure.
@@ -186,30 +428,69 @@ class MinimalPDF:
         pdf.draw_separator([(50, 100), (200, 150), (400, 100)])
         """
 
+        self._emit_separator(columns)
+
+        # Move to the next line
+        self.y -= self.leading
+        if self.y < self.margin:
+            # if margin is 50, y starts at 792(842 - 50) at the top, if y goes below 50, add a new page
+            self.add_page()
+
+    def _emit_separator(self, columns):
+        """
+        :description: Draws a separator at the current vertical position without moving to the next line.
+        :param columns: List of tuples [(col_x, col_width), ...] defining column positions and widths.
+        :return: None
+        :example:
+        pdf._emit_separator([(50, 100), (200, 150), (400, 100)])
+        """
+
+        if self.separator_style == "line":
+            # One rule across all columns, placed where the underscore glyphs would sit
+            # (0.2 em below the baseline) and stroked together with the page's other rules
+            rule_y = round(self.y - 0.2 * self.font_size, 2)
+            start_x = columns[0][0]
+            end_x = columns[-1][0] + columns[-1][1]
+            self.rule_paths.append(f"{start_x} {rule_y} m {end_x} {rule_y} l")
+        else:
+            self._draw_text_separator(columns)
+
+    def _draw_text_separator(self, columns):
+        """
+        :description: Draws a separator as runs of underscore characters, used when the separator
+            style is "text".
+        :param columns: List of tuples [(col_x, col_width), ...] defining column positions and widths.
+        :return: None
+        :example:
+        pdf._draw_text_separator([(50, 100), (200, 150), (400, 100)])
+        """
+
+        # Width of one underscore in points, 556 / 1000 em => 5.004 points at 9pt
+        underscore_width = self.get_string_width("_")
+        # (x, y, text) runs collected for a single text object
+        cells = []
+
         for i, (col_x, col_width) in enumerate(columns):
-            # divide total column width by width of a character to know how many characters fit in the
-            # column width => 100 // 7 => 14 characters fit in the column width 100
-            sep_len = col_width // self.char_width
-            # "_" * 14 => "______________"
-            self.text(col_x, self.y, "_" * sep_len)
+            # divide total column width by width of an underscore to know how many fit in the
+            # column width => 100 // 5.004 => 19 underscores fit in the column width 100
+            sep_len = int(col_width // underscore_width)
+            # "_" * 19 => "___________________"
+            cells.append((col_x, self.y, "_" * sep_len))
 
             if i < len(columns) - 1:
                 # if this is not the last column, find the next column's x position and calculate the
                 # length of the divider line to draw between this column and the next one
                 # e.g., if current column is at 50 with width 100, next column is at 200 the divider
-                # length will be (200 - (50 + 100)) // 7 -> 50 // 7 => 7 characters
+                # length will be (200 - (50 + 100)) // 5.004 -> 50 // 5.004 => 9 underscores
                 next_col_x = columns[i + 1][0]
-                divider_len = (next_col_x - (col_x + col_width)
-                               ) // self.char_width
-                # draw a line of 7 underscores at the end of the current column
-                self.text(col_x + col_width, self.y, "_" *
-                          divider_len)  # 7 => "_______"
+                divider_len = int((next_col_x - (col_x + col_width)
+                                   ) // underscore_width)
+                # draw a line of 9 underscores at the end of the current column
+                cells.append((col_x + col_width, self.y, "_" *
+                              divider_len))  # 9 => "_________"
 
-        # Move to the next line
-        self.y -= self.leading
-        if self.y < self.margin:
-            # if margin is 50, y starts at 792(842 - 50) at the top, if y goes below 50, add a new page
-            self.add_page()
+        # Emit all underscore runs of the separator as one text object
+        self.text_block(cells)
 
     def draw_row(self, row_data, columns, divider=" | "):
         """
@@ -222,41 +503,404 @@ class MinimalPDF:
         pdf.draw_row(["Column 1", "Column 2"], [(40, 252), (302, 252)])
         """
 
-        # Add padding to the left margin so that first column text does not touch the left border
-        left_padding = 10
-
-        # Loop through each data and column pair and wrap text so that it fits within the column width
-        wrapped_columns = [
-            self.wrap_text(data, col_width - left_padding) for data, (_, col_width) in zip(row_data, columns)
-        ]
+        wrapped_columns = self.wrap_row(row_data, columns)
         # Find the column (line of text) which is the longest
         max_lines = max(len(lines) for lines in wrapped_columns)
+        # (x, y, text) runs of the row on the current page, emitted as one text object
+        cells = []
 
         for i in range(max_lines):
             # Check if the current vertical position exceeds the margin and add a new page if necessary
             if self.y - self.leading < self.margin:
+                self.text_block(cells)
+                cells = []
                 self.add_page()
 
-            for j, (col_x, col_width) in enumerate(columns):
-                # If first column (j=0) add left padding to column x position so that text does not touch
-                # the left border. 'text_x' will be the x position where text starts for each column.
-                text_x = col_x + (left_padding if j == 0 else 0)
-                # Add each sublist item to the column
-                text = wrapped_columns[j][i] if i < len(
-                    wrapped_columns[j]) else ""
-                self.text(text_x, self.y, text)
-
-                # Add divider if not the last column
-                if j < len(columns) - 1:
-                    self.text(col_x + col_width, self.y, divider)
+            cells.extend(self._row_line_cells(wrapped_columns, columns, divider, i, self.y))
 
             # Move to the next line
             self.y -= self.leading
 
             # Ensure the vertical position respects the margin
             if self.y < self.margin:
+                self.text_block(cells)
+                cells = []
                 self.add_page()
 
+        self.text_block(cells)
+
+    def wrap_row(self, row_data, columns):
+        """
+        :description: Wraps the text of each column of a row so that it fits within the column width.
+        :param row_data: List of strings representing the data for each column in the row.
+        :param columns: List of tuples [(col_x, col_width), ...] defining column positions and widths.
+        :return: A list with the wrapped lines of each column.
+        :example:
+        wrapped_columns = pdf.wrap_row(["Column 1", "Column 2"], [(40, 252), (302, 252)])
+        """
+
+        # Loop through each data and column pair and wrap text so that it fits within the column width,
+        # leaving room for the left padding of the first column
+        return [
+            self.wrap_text(data, col_width - self.CELL_PADDING) for data, (_, col_width) in zip(row_data, columns)
+        ]
+
+    def _row_line_cells(self, wrapped_columns, columns, divider, line_index, y):
+        """
+        :description: Builds the text runs for one line of a wrapped row, with a divider between columns.
+        :param wrapped_columns: The wrapped lines of each column, as returned by wrap_row().
+        :param columns: List of tuples [(col_x, col_width), ...] defining column positions and widths.
+        :param divider: The divider string between columns.
+        :param line_index: Index of the wrapped line to build.
+        :param y: The y-coordinate of the line.
+        :return: A list of (x, y, text) tuples.
+        :example:
+        cells = pdf._row_line_cells([["Key"], ["Value"]], [(40, 252), (302, 252)], " | ", 0, 700)
+        """
+
+        cells = []
+        for j, (col_x, col_width) in enumerate(columns):
+            # If first column (j=0) add left padding to column x position so that text does not touch
+            # the left border. 'text_x' will be the x position where text starts for each column.
+            text_x = col_x + (self.CELL_PADDING if j == 0 else 0)
+            # Add each sublist item to the column
+            text = wrapped_columns[j][line_index] if line_index < len(
+                wrapped_columns[j]) else ""
+            cells.append((text_x, y, text))
+
+            # Add divider if not the last column
+            if j < len(columns) - 1:
+                cells.append((col_x + col_width, y, divider))
+        return cells
+
+    def plan_table(self, rows, columns, separators=True):
+        """
+        :description: Computes the layout of a table starting from the current vertical position: the
+            wrapped lines and height of every row, and the page every line and separator lands on. No
+            content is emitted and the document state is left untouched, so the plan can be inspected
+            (page count, size estimate, rows per page) before it is drawn with draw_plan().
+        :param rows: Iterable of rows, each a list of strings with one entry per column.
+        :param columns: List of tuples [(col_x, col_width), ...] defining column positions and widths.
+        :param separators: True to plan a separator after every row.
+        :return: A LayoutPlan.
+        :example:
+        plan = pdf.plan_table(rules, [(40, 252), (302, 252)])
+        print(plan.page_count)
+        """
+
+        wrapped_rows = [self.wrap_row(row, columns) for row in rows]
+        line_counts = [max(len(lines) for lines in wrapped_columns) for wrapped_columns in wrapped_rows]
+        pages, end_y = self._paginate(line_counts, separators)
+        return LayoutPlan(wrapped_rows, line_counts, pages, end_y, self.page_count + 1, self.leading, separators)
+
+    def draw_plan(self, plan, columns, divider=" | "):
+        """
+        :description: Draws a table from a LayoutPlan made by plan_table(), reusing its wrapped lines and
+            page breaks. The result is the same as calling draw_row() and draw_separator() for every row.
+            Nothing may be drawn between planning and drawing.
+        :param plan: The LayoutPlan to draw.
+        :param columns: The columns the plan was made with.
+        :param divider: The divider string between columns.
+        :return: None
+        :example:
+        pdf.draw_plan(plan, [(40, 252), (302, 252)])
+        """
+
+        for page_index, ops in enumerate(plan.pages):
+            if page_index > 0:
+                self.add_page()
+            self._draw_page_ops(ops, plan.wrapped_rows, columns, divider)
+        self.y = plan.end_y
+
+    def _draw_page_ops(self, ops, wrapped_rows, columns, divider):
+        """
+        :description: Draws the operations of one page from _paginate(): row segments as one text object
+            each, and separators.
+        :param ops: The page operations, ("row", row_index, first_line, end_line, y) and ("sep", y).
+        :param wrapped_rows: The wrapped lines of each row, indexed by row_index.
+        :param columns: List of tuples [(col_x, col_width), ...] defining column positions and widths.
+        :param divider: The divider string between columns.
+        :return: None
+        :example:
+        pdf._draw_page_ops([("row", 0, 0, 1, 700), ("sep", 689)], [[["Key"], ["Value"]]], columns, " | ")
+        """
+
+        for op in ops:
+            if op[0] == "row":
+                _, row_index, first_line, end_line, y = op
+                cells = []
+                for i in range(first_line, end_line):
+                    cells.extend(self._row_line_cells(wrapped_rows[row_index], columns, divider, i, y))
+                    y -= self.leading
+                self.text_block(cells)
+            else:
+                self.y = op[1]
+                self._emit_separator(columns)
+
+    def render_table(self, rows, columns, divider=" | ", separators=True, workers=1, batch_size=20000):
+        """
+        :description: Draws many table rows using a two-phase engine. Phase one measures the wrapped
+            line count of every row and assigns row lines and separators to pages, without emitting
+            any content. Phase two renders the content stream of each page in a ProcessPoolExecutor
+            and the results are added in page order. The output is the same as calling draw_row()
+            (and draw_separator()) for every row. Rows are processed in batches, so any iterable can
+            be passed. With workers=1 (the default) the rows are drawn one by one as they are read from
+            the iterable. With more workers the rows of the first page are still drawn in this process,
+            so the first page is finished without waiting for a batch. The process pool only helps with
+            spare CPU cores, on a single core it is about twice as slow as drawing in this process. Small
+            batches are drawn directly, and if the pool cannot run the workers (the class must be
+            importable by the worker processes, which it is not in XSOAR) the rows are drawn in this
+            process instead.
+        :param rows: Iterable of rows, each a list of strings with one entry per column.
+        :param columns: List of tuples [(col_x, col_width), ...] defining column positions and widths.
+        :param divider: The divider string between columns.
+        :param separators: True to draw a separator after every row.
+        :param workers: Number of worker processes, None for the number of CPUs (default 1).
+        :param batch_size: Number of rows laid out and rendered per batch.
+        :return: None
+        :example:
+        pdf.render_table(rules, [(40, 252), (302, 252)], workers=4)
+        """
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+        executor = None
+
+        try:
+            rows = iter(rows)
+            if workers <= 1:
+                # Single process, draw the rows as they arrive so streamed input is rendered immediately
+                self._draw_rows(rows, columns, divider, separators)
+                return
+
+            # Draw rows here until the first page is finished, so it reaches the output (or the stream)
+            # straight away instead of after a whole batch has been laid out by the workers
+            first_page = self.page_count
+            for row in rows:
+                self._draw_rows((row,), columns, divider, separators)
+                if self.page_count > first_page:
+                    break
+
+            while True:
+                batch = list(itertools.islice(rows, batch_size))
+                if not batch:
+                    break
+
+                if executor is None and workers > 1 and len(batch) >= self.PARALLEL_MIN_ROWS:
+                    try:
+                        executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+                    except (OSError, NotImplementedError):
+                        # Process pools are not available everywhere, render in this process
+                        workers = 1
+                if executor is not None:
+                    try:
+                        self._render_batch(executor, workers, batch, columns, divider, separators)
+                        continue
+                    except (pickle.PicklingError, concurrent.futures.process.BrokenProcessPool):
+                        # The workers cannot be sent to the pool (or it died), render in this process
+                        executor.shutdown()
+                        executor = None
+                        workers = 1
+                # Nothing to spread over processes, draw the rows directly
+                self._draw_rows(batch, columns, divider, separators)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    def _draw_rows(self, rows, columns, divider, separators):
+        """
+        :description: Draws rows one by one in this process, for render_table().
+        :param rows: Iterable of rows, each a list of strings with one entry per column.
+        :param columns: List of tuples [(col_x, col_width), ...] defining column positions and widths.
+        :param divider: The divider string between columns.
+        :param separators: True to draw a separator after every row.
+        :return: None
+        :example:
+        pdf._draw_rows(batch, [(40, 252), (302, 252)], " | ", True)
+        """
+
+        for row in rows:
+            self.draw_row(row, columns, divider=divider)
+            if separators:
+                self.draw_separator(columns, divider=divider)
+
+    def _render_batch(self, executor, workers, batch, columns, divider, separators):
+        """
+        :description: Lays out and renders one batch of rows in the process pool, for render_table().
+            Nothing is added to the document until every page of the batch has been rendered, so the
+            batch can still be drawn in this process if the pool fails.
+        :param executor: The ProcessPoolExecutor.
+        :param workers: Number of worker processes.
+        :param batch: List of rows.
+        :param columns: List of tuples [(col_x, col_width), ...] defining column positions and widths.
+        :param divider: The divider string between columns.
+        :param separators: True to draw a separator after every row.
+        :return: None
+        :example:
+        pdf._render_batch(executor, 4, batch, [(40, 252), (302, 252)], " | ", True)
+        """
+
+        settings = self._worker_settings()
+
+        # Phase one: wrapped line counts per row, then page assignment
+        chunk = max(len(batch) // (workers * 4), 1)
+        chunks = [batch[i:i + chunk] for i in range(0, len(batch), chunk)]
+        line_counts = []
+        for counts in executor.map(self._count_row_lines, itertools.repeat(settings), itertools.repeat(columns),
+                                   chunks):
+            line_counts.extend(counts)
+        pages, end_y = self._paginate(line_counts, separators)
+
+        # Phase two: render the pages, page 0 continues the current page
+        jobs = []
+        for page_index, ops in enumerate(pages):
+            page_ops = [(op[0], batch[op[1]]) + op[2:] if op[0] == "row" else op for op in ops]
+            jobs.append((settings, columns, divider, page_ops, page_index > 0))
+        results = list(executor.map(self._render_page_job, jobs))
+
+        for page_index, (content, rule_paths) in enumerate(results):
+            if page_index > 0:
+                self._flush_page()
+            self.current_content.append(content)
+            self.rule_paths.extend(rule_paths)
+        self.y = end_y
+
+    @staticmethod
+    def _count_row_lines(settings, columns, rows):
+        """
+        :description: Worker for render_table() phase one, measures the wrapped line count of each row.
+        :param settings: Settings returned by _worker_settings().
+        :param columns: List of tuples [(col_x, col_width), ...] defining column positions and widths.
+        :param rows: List of rows.
+        :return: A list with the wrapped line count of each row.
+        :example:
+        line_counts = MinimalPDF._count_row_lines(settings, [(40, 252), (302, 252)], rows)
+        """
+
+        pdf = MinimalPDF._from_worker_settings(settings)
+        return [max(len(lines) for lines in pdf.wrap_row(row, columns)) for row in rows]
+
+    @classmethod
+    def _render_page_job(cls, job):
+        """
+        :description: Worker for render_table() phase two, renders the content of one page.
+        :param job: Tuple of (settings, columns, divider, ops, new_page). ops are the page operations
+            from _paginate() with the row data in place of the row index, new_page is True when the page
+            furniture has to be drawn.
+        :return: A tuple of the page content and the separator rule paths of the page.
+        :example:
+        content, rule_paths = MinimalPDF._render_page_job(job)
+        """
+
+        settings, columns, divider, ops, new_page = job
+        pdf = cls._from_worker_settings(settings)
+        if new_page:
+            pdf.draw_page_border()
+
+        # Wrap the rows of the page and point the row operations at them
+        wrapped_rows = []
+        page_ops = []
+        for op in ops:
+            if op[0] == "row":
+                wrapped_rows.append(pdf.wrap_row(op[1], columns))
+                op = ("row", len(wrapped_rows) - 1) + op[2:]
+            page_ops.append(op)
+        pdf._draw_page_ops(page_ops, wrapped_rows, columns, divider)
+        return "".join(pdf.current_content), pdf.rule_paths
+
+    def _paginate(self, line_counts, separators):
+        """
+        :description: Assigns the lines of each row, and the separators, to pages starting from the
+            current vertical position. Page breaks happen exactly where draw_row() and draw_separator()
+            would break.
+        :param line_counts: Wrapped line count of each row.
+        :param separators: True if a separator follows every row.
+        :return: A tuple of the pages and the vertical position after the last row. Each page is a list of
+            ("row", row_index, first_line, end_line, y) and ("sep", y) operations; the first page is the
+            current page.
+        :example:
+        pages, y = pdf._paginate([1, 3, 2], True)
+        """
+
+        # Vertical position where a new page starts, as set by add_page()
+        top = self.page_height - self.margin - self.leading
+        if self.template_top is not None:
+            top = self.template_top
+
+        y = self.y
+        page = []
+        pages = [page]
+        for row_index, line_count in enumerate(line_counts):
+            first_line = 0
+            segment_y = None
+            for i in range(line_count):
+                if y - self.leading < self.margin:
+                    if segment_y is not None:
+                        page.append(("row", row_index, first_line, i, segment_y))
+                    page = []
+                    pages.append(page)
+                    y = top
+                    first_line = i
+                    segment_y = None
+                if segment_y is None:
+                    segment_y = y
+                y -= self.leading
+                if y < self.margin:
+                    page.append(("row", row_index, first_line, i + 1, segment_y))
+                    page = []
+                    pages.append(page)
+                    y = top
+                    first_line = i + 1
+                    segment_y = None
+            if segment_y is not None:
+                page.append(("row", row_index, first_line, line_count, segment_y))
+
+            if separators:
+                page.append(("sep", y))
+                y -= self.leading
+                if y < self.margin:
+                    page = []
+                    pages.append(page)
+                    y = top
+        return pages, y
+
+    def _worker_settings(self):
+        """
+        :description: Collects the layout settings a worker process needs to measure and render pages
+            exactly like this document.
+        :return: A dictionary of picklable settings.
+        :example:
+        settings = pdf._worker_settings()
+        """
+
+        return {
+            "page_width": self.page_width,
+            "page_height": self.page_height,
+            "margin": self.margin,
+            "font_size": self.font_size,
+            "separator_style": self.separator_style,
+            "template": self.template_obj is not None,
+        }
+
+    @classmethod
+    def _from_worker_settings(cls, settings):
+        """
+        :description: Creates a scratch MinimalPDF with the given layout settings, used by worker processes
+            to measure and render pages.
+        :param settings: Settings returned by _worker_settings().
+        :return: A MinimalPDF instance.
+        :example:
+        pdf = MinimalPDF._from_worker_settings(settings)
+        """
+
+        pdf = cls("", settings["page_width"], settings["page_height"], settings["margin"])
+        pdf.set_font(settings["font_size"])
+        pdf.separator_style = settings["separator_style"]
+        if settings["template"]:
+            # Any object number works, the worker only emits the /Fx1 Do reference
+            pdf.template_obj = 0
+        return pdf
+
     def cell(self, w, h, txt):
         """
         :description: Draws a cell with specified width and height, wrapping text to fit within the cell.
@@ -307,7 +951,7 @@ class MinimalPDF:
         usable_width = self.get_usable_width()
         # Calculate the x position to center the header text
         header_x = self.margin + \
-            (usable_width - len(header_text) * self.char_width) // 2
+            int(usable_width - self.get_string_width(header_text)) // 2
         # Calculate the y position for the header text
         header_y = self.page_height - self.margin - \
             self.leading  # Adjust Y to stay inside the border
@@ -320,7 +964,8 @@ class MinimalPDF:
         separator_end_x = self.page_width - self.margin
 
         # Use pdf commands to draw the separator line below the header
-        self.current_content += f"{separator_start_x} {separator_y} m {separator_end_x} {separator_y} l S\n"
+        self.current_content.append(
+            f"{separator_start_x} {separator_y} m {separator_end_x} {separator_y} l S\n")
 
         # Set y position for the next content below the separator
         self.y = separator_y - self.leading
@@ -339,13 +984,73 @@ class MinimalPDF:
         pdf.draw_page_border()
         """
 
+        if self.template_obj is not None:
+            # The border is part of the shared page template, draw the whole template
+            self.current_content.append("/Fx1 Do\n")
+            return
+
+        self.current_content.append(self._border_path())
+
+    def set_page_template(self, header_text=None, footer_text=None):
+        """
+        :description: Defines the page furniture (the page border plus an optional header and footer)
+            once as a Form XObject that every page draws with a single Do operator instead of
+            repeating the drawing commands. Viewers can cache the shared drawing. Set the margin
+            before calling this, and call add_page() to start the first page.
+        :param header_text: Text centred at the top of every page with a separator line below it,
+            laid out like add_header() (default is no header).
+        :param footer_text: Text centred below the bottom border of every page (default is no footer).
+        :return: None
+        :example:
+        pdf.set_page_template(header_text="Keys and Values", footer_text="Confidential")
+        pdf.add_page()
+        """
+
+        content = [self._border_path()]
+        self.template_top = None
+        self.template_footer = bool(footer_text)
+
+        if header_text:
+            # Same geometry as add_header(): 16pt text, separator one line below it
+            header_size = 16
+            header_leading = int(header_size * 1.3)
+            usable_width = self.get_usable_width()
+            header_x = self.margin + \
+                int(usable_width - self.get_string_width(header_text, header_size)) // 2
+            header_y = self.page_height - self.margin - header_leading
+            separator_y = header_y - header_leading
+            content.append(
+                f"BT /F1 {header_size} Tf {header_x} {header_y} Td ({self._escape(header_text)}) Tj ET\n")
+            content.append(
+                f"{self.margin} {separator_y} m {self.page_width - self.margin} {separator_y} l S\n")
+            self.template_top = separator_y - header_leading
+
+        if footer_text:
+            footer_x = self.margin + \
+                int(self.get_usable_width() - self.get_string_width(footer_text)) // 2
+            footer_y = self.margin - self.leading
+            content.append(
+                f"BT /F1 {self.font_size} Tf {footer_x} {footer_y} Td ({self._escape(footer_text)}) Tj ET\n")
+
+        self.page_template = "".join(content)
+        if self.template_obj is None:
+            self.template_obj = self.next_obj
+            self.next_obj += 1
+
+    def _border_path(self):
+        """
+        :description: Builds the path operators for the rectangle border around the page.
+        :return: The border path as a content stream string.
+        :example:
+        border = pdf._border_path()
+        """
         border_start_x = self.margin
         border_start_y = self.margin
         border_end_x = self.page_width - self.margin
         border_end_y = self.page_height - self.margin
 
         # Draw the rectangle border
-        self.current_content += (
+        return (
             f"{border_start_x} {border_start_y} m "
             f"{border_end_x} {border_start_y} l "
             f"{border_end_x} {border_end_y} l "
@@ -353,100 +1058,335 @@ class MinimalPDF:
             f"h S\n"
         )
 
+    def open_stream(self, stream):
+        """
+        :description: Switches the PDF to streaming mode. The PDF header and font object are written
+            to the given binary file or socket straight away, and each page's content and page objects
+            are written as soon as the page is finished instead of being kept in memory until output().
+            Byte offsets for the xref table are recorded as objects are written, so peak memory stays
+            flat regardless of the number of pages. Call this before the first page is finished, and
+            only once; RuntimeError is raised when the document has already been started.
+        :param stream: A writable binary file-like object, e.g. a file opened with "wb".
+        :return: None
+        :example:
+        with open("output.pdf", "wb") as f:
+            pdf.open_stream(f)
+            pdf.draw_row(["Key", "Value"], columns)
+            pdf.output()
+        """
+
+        if self.stream_offset:
+            raise RuntimeError("The PDF output has already been started")
+        self.stream = stream
+        self._start_document()
+
+        # Write any pages that were finished before streaming was enabled
+        for content in self.pages:
+            self._write_page(content)
+        self.pages = []
+
     def output(self):
         """
         :description: Generates the PDF content as a binary stream. This method compiles all
             the page content, metadata, and necessary PDF structure into a binary format.
-        :return: A BytesIO object containing the PDF binary data.
+            In streaming mode (see open_stream) only the remaining page, the document-level
+            objects, the xref table and the trailer are written to the open stream.
+            The document can only be written once, a second call raises RuntimeError.
+        :return: A BytesIO object containing the PDF binary data, or the stream passed to
+            open_stream in streaming mode.
         :example:
         bin_pdf = pdf.output()
         with open("output.pdf", "wb") as f:
             f.write(bin_pdf.getvalue())
         """
 
-        if self.current_content:
-            self.pages.append(self.current_content)
-
-        pdf = io.BytesIO()
-        pdf.write(b"%PDF-1.4\n")
-        xref = [0]  # PDF spec: object 0 is always free
-        obj_count = 1
-
-        # Info object
-        xref.append(pdf.tell())
-        info_obj = obj_count
-        info_dict = (f"{info_obj} 0 obj\n"
-                     f"<< /Title ({self.metadata['Title']})\n"
-                     f"/Author ({self.metadata['Author']})\n"
-                     f"/Producer ({self.metadata['Producer']})\n"
-                     f">>\nendobj\n")
-        pdf.write(info_dict.encode())
-        obj_count += 1
-
-        # Font object
-        xref.append(pdf.tell())
-        font_obj = obj_count
-        font = f"{font_obj} 0 obj\n<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>\nendobj\n"
-        pdf.write(font.encode())
-        obj_count += 1
-
-        # Content streams
-        content_objs = []
+        if self.finished:
+            raise RuntimeError("output() has already been called, the PDF can only be written once")
+        self.finished = True
+
+        # Finish the last page before any output is set up, so that in memory it is queued after the
+        # other pages instead of being written ahead of them
+        self._flush_page()
+
+        in_memory = self.stream is None
+        if in_memory:
+            self.stream = io.BytesIO()
+            self._start_document()
+
         for content in self.pages:
-            xref.append(pdf.tell())
-            content_obj = obj_count
-            stream_bytes = content.encode()
-            stream = (f"{content_obj} 0 obj\n<< /Length {len(stream_bytes)} >>\nstream\n").encode(
-            ) + stream_bytes + b"\nendstream\nendobj\n"
-            pdf.write(stream)
-            content_objs.append(content_obj)
-            obj_count += 1
-
-        # Page objects
-        page_objs = []
-        for content_obj in content_objs:
-            xref.append(pdf.tell())
-            page_obj = obj_count
-            page = (f"{page_obj} 0 obj\n"
-                    f"<< /Type /Page /Parent {obj_count + 1} 0 R /MediaBox [0 0 {self.page_width} {self.page_height}] "
-                    f"/Contents {content_obj} 0 R /Resources << /Font << /F1 {font_obj} 0 R >> >> >>\n"
-                    f"endobj\n")
-            pdf.write(page.encode())
-            page_objs.append(page_obj)
-            obj_count += 1
+            self._write_page(content)
+        self.pages = []
+        self.metadata["PageCount"] = len(self.page_objs)
+
+        # Info object, written last so metadata set after drawing is included
+        info_dict = (f"<< /Title ({self._escape(str(self.metadata['Title']))})\n"
+                     f"/Author ({self._escape(str(self.metadata['Author']))})\n"
+                     f"/Producer ({self._escape(str(self.metadata['Producer']))})\n"
+                     f">>")
+        self._write_dict_object(self.INFO_OBJ, info_dict.encode())
+
+        # Page furniture Form XObject, drawn by every page with /Fx1 Do
+        if self.template_obj is not None:
+            stream_bytes, stream_filter = self._encode_stream(self.page_template)
+            xobject = (f"<< /Type /XObject /Subtype /Form /BBox [0 0 {self.page_width} {self.page_height}] "
+                       f"/Resources << /Font << /F1 {self.FONT_OBJ} 0 R >> >> "
+                       f"/Length {len(stream_bytes)}{stream_filter} >>\nstream\n")
+            self._write_object(self.template_obj, xobject.encode() + stream_bytes + b"\nendstream")
 
         # Pages root object
-        xref.append(pdf.tell())
-        pages_obj = obj_count
-        kids = " ".join([f"{p} 0 R" for p in page_objs])
-        pages = (f"{pages_obj} 0 obj\n"
-                 f"<< /Type /Pages /Kids [{kids}] /Count {len(page_objs)} >>\n"
-                 f"endobj\n")
-        pdf.write(pages.encode())
-        obj_count += 1
+        kids = " ".join([f"{p} 0 R" for p in self.page_objs])
+        pages = f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_objs)} >>"
+        self._write_dict_object(self.PAGES_OBJ, pages.encode())
 
         # Catalog object
-        xref.append(pdf.tell())
-        catalog_obj = obj_count
-        catalog = (f"{catalog_obj} 0 obj\n"
-                   f"<< /Type /Catalog /Pages {pages_obj} 0 R >>\n"
-                   f"endobj\n")
-        pdf.write(catalog.encode())
-        obj_count += 1
-
-        # Write xref table
-        xref_start = pdf.tell()
-        pdf.write(f"xref\n0 {obj_count}\n".encode())
-        for offset in xref:
-            pdf.write(f"{offset:010} 00000 n \n".encode())
+        catalog = f"<< /Type /Catalog /Pages {self.PAGES_OBJ} 0 R >>"
+        self._write_dict_object(self.CATALOG_OBJ, catalog.encode())
+
+        if self.object_streams:
+            self._flush_object_stream()
+            self._write_xref_stream()
+        else:
+            self._write_xref_table()
+
+        pdf = self.stream
+        if in_memory:
+            self.stream = None
+            pdf.seek(0)
+        else:
+            pdf.flush()
+        return pdf
+
+    def _start_document(self):
+        """
+        :description: Writes the PDF header and the font object to the output stream.
+        :return: None
+        :example:
+        pdf._start_document()
+        """
+
+        self._write(b"%PDF-1.5\n" if self.object_streams else b"%PDF-1.4\n")
+        self._write_dict_object(
+            self.FONT_OBJ, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    def _write_page(self, content):
+        """
+        :description: Writes the content stream object and page object for one finished page
+            to the output stream.
+        :param content: The page content stream as a string.
+        :return: None
+        :example:
+        pdf._write_page("40 40 m 555 40 l S\n")
+        """
+
+        content_obj = self.next_obj
+        page_obj = content_obj + 1
+        self.next_obj += 2
+
+        stream_bytes, stream_filter = self._encode_stream(content)
+        self._write_object(
+            content_obj,
+            f"<< /Length {len(stream_bytes)}{stream_filter} >>\nstream\n".encode()
+            + stream_bytes + b"\nendstream"
+        )
+
+        xobjects = ""
+        if self.template_obj is not None:
+            xobjects = f" /XObject << /Fx1 {self.template_obj} 0 R >>"
+        page = (f"<< /Type /Page /Parent {self.PAGES_OBJ} 0 R /MediaBox [0 0 {self.page_width} {self.page_height}] "
+                f"/Contents {content_obj} 0 R /Resources << /Font << /F1 {self.FONT_OBJ} 0 R >>{xobjects} >> >>")
+        self._write_dict_object(page_obj, page.encode())
+        self.page_objs.append(page_obj)
+
+    def _write_object(self, obj_num, body):
+        """
+        :description: Writes an indirect object to the output stream and records its byte offset
+            for the xref table.
+        :param obj_num: The object number.
+        :param body: The object body as bytes (a dictionary, optionally followed by a stream).
+        :return: None
+        :example:
+        pdf._write_object(2, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+        """
+
+        self.xref_offsets[obj_num] = self.stream_offset
+        self._write(f"{obj_num} 0 obj\n".encode() + body + b"\nendobj\n")
+
+    def _write_dict_object(self, obj_num, body):
+        """
+        :description: Writes a non-stream object. In PDF 1.5 mode the object is queued for the next
+            object stream, which is written once it holds OBJECTS_PER_STREAM objects.
+        :param obj_num: The object number.
+        :param body: The object body as bytes.
+        :return: None
+        :example:
+        pdf._write_dict_object(4, b"<< /Type /Catalog /Pages 3 0 R >>")
+        """
+
+        if not self.object_streams:
+            self._write_object(obj_num, body)
+            return
+
+        self.pending_objs.append((obj_num, body))
+        if len(self.pending_objs) >= self.OBJECTS_PER_STREAM:
+            self._flush_object_stream()
+
+    def _flush_object_stream(self):
+        """
+        :description: Packs the queued objects into one object stream and writes it. The stream
+            starts with pairs of object number and byte offset relative to /First.
+        :return: None
+        :example:
+        pdf._flush_object_stream()
+        """
+
+        if not self.pending_objs:
+            return
+
+        stream_obj = self.next_obj
+        self.next_obj += 1
+
+        index_entries = []
+        bodies = []
+        offset = 0
+        for index, (obj_num, body) in enumerate(self.pending_objs):
+            index_entries.append(f"{obj_num} {offset}")
+            bodies.append(body)
+            # Bodies are separated by a single newline
+            offset += len(body) + 1
+            self.compressed_objs[obj_num] = (stream_obj, index)
+
+        first = (" ".join(index_entries) + "\n").encode()
+        stream_bytes, stream_filter = self._encode_stream(first + b"\n".join(bodies))
+        header = (f"<< /Type /ObjStm /N {len(self.pending_objs)} /First {len(first)} "
+                  f"/Length {len(stream_bytes)}{stream_filter} >>\nstream\n")
+        self._write_object(stream_obj, header.encode() + stream_bytes + b"\nendstream")
+        self.pending_objs = []
+
+    def _write_xref_table(self):
+        """
+        :description: Writes the classic cross-reference table and trailer (PDF 1.4).
+        :return: None
+        :example:
+        pdf._write_xref_table()
+        """
+
+        # Object 0 is always the head of the free list
+        xref_start = self.stream_offset
+        xref = [f"xref\n0 {self.next_obj}\n", "0000000000 65535 f \n"]
+        for obj_num in range(1, self.next_obj):
+            xref.append(f"{self.xref_offsets[obj_num]:010} 00000 n \n")
+        self._write("".join(xref).encode())
 
         # Write trailer
-        pdf.write(
-            (f"trailer\n<< /Size {obj_count} /Root {catalog_obj} 0 R /Info {info_obj} 0 R >>\n"
+        self._write(
+            (f"trailer\n<< /Size {self.next_obj} /Root {self.CATALOG_OBJ} 0 R /Info {self.INFO_OBJ} 0 R >>\n"
              f"startxref\n{xref_start}\n%%EOF\n").encode()
         )
-        pdf.seek(0)
-        return pdf
+
+    def _write_xref_stream(self):
+        """
+        :description: Writes a compressed cross-reference stream, which replaces both the xref table
+            and the trailer in PDF 1.5. Each entry is a type byte, a byte offset (type 1) or object
+            stream number (type 2), and a generation number or index within the object stream.
+        :return: None
+        :example:
+        pdf._write_xref_stream()
+        """
+
+        xref_obj = self.next_obj
+        self.next_obj += 1
+        xref_start = self.stream_offset
+        self.xref_offsets[xref_obj] = xref_start
+
+        # Wide enough for the largest offset, at least 4 bytes
+        offset_width = max(4, (xref_start.bit_length() + 7) // 8)
+        entries = [b"\x00" + bytes(offset_width) + b"\xff\xff"]
+        for obj_num in range(1, self.next_obj):
+            if obj_num in self.compressed_objs:
+                stream_obj, index = self.compressed_objs[obj_num]
+                entries.append(b"\x02" + stream_obj.to_bytes(offset_width, "big") + index.to_bytes(2, "big"))
+            else:
+                entries.append(b"\x01" + self.xref_offsets[obj_num].to_bytes(offset_width, "big") + b"\x00\x00")
+
+        stream_bytes, stream_filter = self._encode_stream(b"".join(entries))
+        header = (f"<< /Type /XRef /Size {self.next_obj} /W [1 {offset_width} 2] "
+                  f"/Root {self.CATALOG_OBJ} 0 R /Info {self.INFO_OBJ} 0 R "
+                  f"/Length {len(stream_bytes)}{stream_filter} >>\nstream\n")
+        self._write_object(xref_obj, header.encode() + stream_bytes + b"\nendstream")
+        self._write(f"startxref\n{xref_start}\n%%EOF\n".encode())
+
+    def _write(self, data):
+        """
+        :description: Writes raw bytes to the output stream and advances the byte offset. The offset
+            is tracked here rather than with tell() so that sockets and pipes can be used as output.
+        :param data: The bytes to write.
+        :return: None
+        :example:
+        pdf._write(b"%PDF-1.4\n")
+        """
+
+        self.stream.write(data)
+        self.stream_offset += len(data)
+
+    def _encode_stream(self, content):
+        """
+        :description: Encodes a content stream for writing, compressing it with zlib when
+            compression is enabled.
+        :param content: The stream content as a string or bytes.
+        :return: A tuple of the stream bytes and the /Filter entry for the stream dictionary
+            (an empty string when the stream is not compressed).
+        :example:
+        stream_bytes, stream_filter = pdf._encode_stream("40 40 m 555 40 l S\n")
+        """
+
+        stream_bytes = content.encode() if isinstance(content, str) else content
+        if not self.compress:
+            return stream_bytes, ""
+        return zlib.compress(stream_bytes, self.compression_level), " /Filter /FlateDecode"
+
+    def _flush_page(self):
+        """
+        :description: Joins the content chunks of the current page once and stores the result as a
+            finished page, or writes it straight to the output stream in streaming mode. Building the
+            page as a list of chunks keeps rendering linear in the number of operators instead of
+            re-copying the whole page string on every append.
+        :return: None
+        :example:
+        pdf._flush_page()
+        """
+
+        if self.current_content or self.rule_paths:
+            content = "".join(self.current_content)
+            self.current_content = []
+            self.page_count += 1
+            if self.page_number_format is not None:
+                content += self._page_number_text(self.page_count)
+            if self.rule_paths:
+                # Stroke all separator rules of the page with a single thin pen
+                content += "q 0.5 w\n" + "\n".join(self.rule_paths) + " S Q\n"
+                self.rule_paths = []
+            if self.stream is not None:
+                self._write_page(content)
+            else:
+                self.pages.append(content)
+
+    def _page_number_text(self, page_number):
+        """
+        :description: Builds the page number footer for a page, right-aligned below the bottom border,
+            on the line below the template footer if there is one.
+        :param page_number: The document page number (1-based).
+        :return: The footer as a content stream string.
+        :example:
+        footer = pdf._page_number_text(3)
+        """
+
+        label = self.page_number_format.format(page=page_number, total=self.page_total)
+        x = int(self.page_width - self.margin - self.get_string_width(label))
+        y = self.margin - self.leading
+        if self.template_footer:
+            # Keep clear of the template footer, which is centred on the first line below the border
+            y -= self.leading
+        return f"BT /F1 {self.font_size} Tf {x} {y} Td ({self._escape(label)}) Tj ET\n"
 
     def _escape(self, txt):
         """
@@ -460,33 +1400,154 @@ class MinimalPDF:
         return txt.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
 
 
-def process_json_object(object_match, pdf, column_width, spacing):
-    json_str = object_match.group(1)
-    json_str = bytes(json_str, "utf-8").decode("unicode_escape")
-    data = json.loads(json_str)
+class LayoutPlan:
+    """
+    The layout of a table computed up front by MinimalPDF.plan_table(), without emitting any content.
+    It holds the wrapped lines, line count and height of every row, the operations on every page and
+    the page each row lands on, so callers can print "page X of N" footers, estimate the output size
+    or split a job before rendering. MinimalPDF.draw_plan() renders the plan without wrapping again.
+    """
+
+    def __init__(self, wrapped_rows, line_counts, pages, end_y, first_page, leading, separators):
+        """
+        :description: Stores the layout computed by MinimalPDF.plan_table().
+        :param wrapped_rows: The wrapped lines of each column of each row.
+        :param line_counts: Wrapped line count of each row.
+        :param pages: Operations per page as returned by MinimalPDF._paginate(), the first page is the
+            page that was current when the plan was made.
+        :param end_y: The vertical position after the last row.
+        :param first_page: Document page number (1-based) of the first planned page.
+        :param leading: Line height in points.
+        :param separators: True if a separator follows every row.
+        :return: None
+        """
+
+        self.wrapped_rows = wrapped_rows
+        self.line_counts = line_counts
+        self.pages = pages
+        self.end_y = end_y
+        self.first_page = first_page
+        # Total number of pages in the document once the plan is drawn
+        self.page_count = first_page - 1 + len(pages)
+        # Height of each row in points, including its separator line
+        self.row_heights = [
+            (count + (1 if separators else 0)) * leading for count in line_counts
+        ]
+        # (first page, last page) document page numbers of each row, None for rows without text
+        self.row_pages = [None] * len(line_counts)
+        for page_index, ops in enumerate(pages):
+            page_number = first_page + page_index
+            for op in ops:
+                if op[0] == "row":
+                    first = self.row_pages[op[1]]
+                    self.row_pages[op[1]] = (first[0] if first else page_number, page_number)
+
+    def rows_on_page(self, page_number):
+        """
+        :description: Lists the rows that have at least one line on a page.
+        :param page_number: Document page number (1-based).
+        :return: A list of row indices.
+        :example:
+        rows = plan.rows_on_page(3)
+        """
+
+        ops = self.pages[page_number - self.first_page]
+        return sorted({op[1] for op in ops if op[0] == "row"})
+
+    def estimate_content_size(self):
+        """
+        :description: Estimates the size in bytes of the uncompressed content streams the plan will produce,
+            from the length of the wrapped text plus a fixed cost for the operators around each text run,
+            row and separator.
+        :return: The estimated size in bytes.
+        :example:
+        size = plan.estimate_content_size()
+        """
+
+        size = 0
+        for wrapped_columns, line_count in zip(self.wrapped_rows, self.line_counts):
+            # Text object per row, positioning and show operators per run
+            size += 20 + sum(len(line) + 16 for lines in wrapped_columns for line in lines)
+            # Divider runs between columns
+            size += line_count * (len(wrapped_columns) - 1) * 20
+        separators = sum(1 for ops in self.pages for op in ops if op[0] == "sep")
+        return size + separators * 30 + len(self.pages) * 60
+
+
+JSON_DECODER = json.JSONDecoder()
+# One level of backslash escaping, as in Input="{\"Commands\": ...}"
+ESCAPE_PATTERN = re.compile(r'\\(u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|[0-7]{1,3}|.)', re.DOTALL)
+ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f", "a": "\a", "v": "\v",
+           '"': '"', "'": "'", "\\": "\\", "\n": ""}
+
+
+def _unescape_char(match):
+    """Decode one backslash escape matched by ESCAPE_PATTERN."""
+    code = match.group(1)
+    if code[0] in "ux" and len(code) > 1:
+        return chr(int(code[1:], 16))
+    if code[0] in "01234567":
+        return chr(int(code, 8))
+    return ESCAPES.get(code, match.group(0))
+
+
+def unescape_json(text, start=0, end=None):
+    """
+    Remove one level of backslash escaping from the JSON payload at text[start:end].
+    Returns (json_text, pos), the text holding the payload and the position where it starts.
+    Plain JSON (its first quote is not escaped) is neither copied nor decoded, the input text
+    itself is returned. An escaped payload is the content of a quoted argument, so it is decoded
+    in one pass by the C string scanner of the json module, up to the closing quote. Escapes
+    that JSON does not know fall back to a regex substitution. Unlike the unicode_escape codec,
+    non-ASCII text is kept as it is.
+    """
+    if end is None:
+        end = len(text)
+    quote = text.find('"', start, end)
+    if quote == -1:
+        escaped = text.find("\\", start, end) != -1
+    else:
+        escaped = quote > start and text[quote - 1] == "\\"
+    if not escaped:
+        return text, start
+    try:
+        return json.decoder.scanstring(text, start, False)[0], 0
+    except ValueError:
+        return ESCAPE_PATTERN.sub(_unescape_char, text[start:end]), 0
+
+
+def load_payload(text, start=0, end=None):
+    """Decode the JSON document at text[start:end], unescaping it first when needed."""
+    return JSON_DECODER.raw_decode(*unescape_json(text, start, end))[0]
+
+
+def process_json_object(text, spans, pdf, column_width, spacing, workers=1):
     rows = []
-    # If "Commands" key exists, flatten its contents
-    if isinstance(data, dict) and "Commands" in data:
-        for cmd in data["Commands"]:
-            for k, v in cmd.items():
-                if k == "Output":
-                    idx = str(v).find('index:')
-                    if idx != -1:
-                        v = str(v)[:idx].strip()
-                rows.append([k.lower(), str(v)])
-        for k, v in data.items():
-            if k != "Commands":
-                rows.append([k.lower(), str(v)])
+    found = False
+    for start, end in spans:
+        # raw_decode stops at the closing bracket of the object
+        data = load_payload(text, start, end)
+        # If "Commands" key exists, flatten its contents
+        if isinstance(data, dict) and "Commands" in data:
+            found = True
+            for cmd in data["Commands"]:
+                for k, v in cmd.items():
+                    if k == "Output":
+                        idx = str(v).find('index:')
+                        if idx != -1:
+                            v = str(v)[:idx].strip()
+                    rows.append([k.lower(), str(v)])
+            for k, v in data.items():
+                if k != "Commands":
+                    rows.append([k.lower(), str(v)])
+    if found:
         columns = [
             (pdf.margin, column_width),
             (pdf.margin + column_width + spacing, column_width),
         ]
         divider = " | "
-        for row in rows:
-            pdf.draw_row(row, columns, divider=divider)
-            pdf.draw_separator(columns, divider=divider)
+        pdf.render_table(rows, columns, divider=divider, workers=workers)
         pdf.set_metadata("Title", "Keys and Values PDF")
-        pdf.set_metadata("PageCount", len(pdf.pages))
         return pdf.output()
     else:
         print("Unsupported JSON structure.")
@@ -494,9 +1555,8 @@ def process_json_object(object_match, pdf, column_width, spacing):
 
 
 def process_json_array(array_str, pdf, column_width, label):
-    array_str = bytes(array_str, "utf-8").decode("unicode_escape")
     try:
-        data = json.loads(array_str)
+        data = load_payload(array_str)
     except Exception as e:
         print(f"Failed to parse JSON array: {e}")
         return None
@@ -516,54 +1576,75 @@ def process_json_array(array_str, pdf, column_width, label):
     pdf.draw_separator(columns, divider=divider)
 
     pdf.set_metadata("Title", "Rules List PDF")
-    pdf.set_metadata("PageCount", len(pdf.pages))
     return pdf.output()
 
 
+def _workers_arg(value):
+    """
+    argparse type for --workers: a number of worker processes, with 0 meaning one per CPU.
+    """
+    try:
+        workers = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid number of workers: {value!r}") from None
+    if workers < 0:
+        raise argparse.ArgumentTypeError(f"workers must not be negative: {workers}")
+    return workers or None
+
+
 def main():
+    """
+    Read a JSON object or array from stdin and write it to output.pdf.
+    """
+    parser = argparse.ArgumentParser(
+        description="Write the JSON object or array read from stdin as a table to output.pdf.")
+    parser.add_argument("--workers", type=_workers_arg, default=1,
+                        help="worker processes for rendering the table, 0 for one per CPU "
+                             "(default: 1, the process pool only helps with spare CPU cores)")
+    args = parser.parse_args()
+
     try:
         raw_input = sys.stdin.read().strip()
 
-        object_pattern = r'Input="({.*})"'
-        array_pattern = r'(".*?")\s+value="(\[.*?\])"(?:\s+regex=".*?")?'
-        regex_extract_pattern = r'!RegexExtractAll\s+value="(\[.*?\])"(?:\s+regex=".*?")?'
-
-        object_match = re.search(object_pattern, raw_input)
-        array_match = re.search(array_pattern, raw_input)
-        regex_extract_match = re.search(regex_extract_pattern, raw_input)
+        # Find the JSON object or array in a single scan
+        kind, spans = classify_pdf_input(raw_input)
 
         pdf = MinimalPDF("output.pdf")
         pdf.set_margin(40)
         pdf.set_font(9)
-        pdf.draw_page_border()
+        # The border is defined once and drawn on every page, the header only goes on the first page
+        pdf.set_page_template()
+        pdf.add_page()
         pdf.add_header("Keys and Values")
 
         usable_width = pdf.get_usable_width()
         spacing = 10
         column_width = (usable_width - spacing)
 
-        if object_match:
+        if kind == "object":
             bin_pdf = process_json_object(
-                object_match, pdf, column_width // 2, spacing)
+                raw_input, spans, pdf, column_width // 2, spacing, args.workers)
             if bin_pdf:
                 with open("output.pdf", "wb") as f:
-                    f.write(bin_pdf.read())
+                    f.write(bin_pdf.getbuffer())
                 print("PDF file 'output.pdf' has been created successfully.")
-        elif array_match:
-            label = array_match.group(1).strip('"')
-            array_str = array_match.group(2)
+        elif kind == "array":
+            (label_start, label_end), (start, end) = spans
+            label = raw_input[label_start:label_end].strip('"')
+            array_str = raw_input[start:end]
             bin_pdf = process_json_array(array_str, pdf, column_width, label)
             if bin_pdf:
                 with open("output.pdf", "wb") as f:
-                    f.write(bin_pdf.read())
+                    f.write(bin_pdf.getbuffer())
                 print("PDF file 'output.pdf' has been created successfully.")
-        elif regex_extract_match:
+        elif kind == "regex_extract":
             label = "RegexExtractAll"
-            array_str = regex_extract_match.group(1)
+            start, end = spans[0]
+            array_str = raw_input[start:end]
             bin_pdf = process_json_array(array_str, pdf, column_width, label)
             if bin_pdf:
                 with open("output.pdf", "wb") as f:
-                    f.write(bin_pdf.read())
+                    f.write(bin_pdf.getbuffer())
                 print("PDF file 'output.pdf' has been created successfully.")
         else:
             print("No valid JSON object or array found in the input string")
@@ -1,13 +1,63 @@
 import ast
+import json
 import sys
 
 
+def scan_string_list(value):
+    # Hand-written scanner for a flat list of quoted strings, e.g. ["any", 'zone-1'].
+    # Returns None for anything else (escapes, numbers, nesting, ...) so the caller can fall back.
+    if "\x00" in value or "\r" in value or "\n" in value:
+        return None
+    items = []
+    i, end = 1, len(value) - 1
+    while True:
+        while i < end and value[i] in " \t":
+            i += 1
+        if i == end:
+            # Empty list or a trailing comma
+            return items
+        quote = value[i]
+        if quote not in "\"'":
+            return None
+        close = value.find(quote, i + 1, end)
+        if close == -1:
+            return None
+        item = value[i + 1:close]
+        if "\\" in item:
+            return None
+        items.append(item)
+        i = close + 1
+        while i < end and value[i] in " \t":
+            i += 1
+        if i == end:
+            return items
+        if value[i] != ",":
+            return None
+        i += 1
+
+
+def parse_string_list(value):
+    # Parses a bracketed value with the cheapest parser that gives the same result as ast.literal_eval:
+    # json.loads for JSON string arrays without escapes, then the scanner, then literal_eval itself
+    if "\\" not in value:
+        try:
+            items = json.loads(value)
+        except ValueError:
+            items = None
+        if isinstance(items, list) and all(isinstance(item, str) for item in items):
+            return items
+    items = scan_string_list(value)
+    if items is not None:
+        return items
+    return ast.literal_eval(value)
+
+
 def clean_and_parse(value):
     value = value.strip()
     if value.startswith('[') and value.endswith(']'):
         value = value.replace('\\"', '"')
         try:
-            return ast.literal_eval(value)
+            return parse_string_list(value)
         except Exception:
             return value
     return value
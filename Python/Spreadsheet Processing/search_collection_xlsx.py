@@ -1,40 +1,377 @@
+import argparse
+from array import array
+from datetime import datetime, time, timedelta
+import hashlib
+import itertools
+import json
+import math
+import os
+import re
+import sys
+import zipfile
+import numpy as np
 import pandas as pd
 
 
-def load_xlsx_data(file_path):
+# Layout of the sidecar cache written by load_xlsx_data(), bump it when the cached data changes
+CACHE_VERSION = 4
+# Type tags of the cells of object columns in the cache, see _pack_column()
+CELL_STR, CELL_FLOAT, CELL_INT, CELL_BOOL, CELL_NONE, CELL_DATETIME, CELL_TIMESTAMP, CELL_TIME = \
+    range(8)
+# Dates are cached as microseconds since EPOCH, times as microseconds since midnight
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+# Errors from reading a workbook that is missing, unreadable or not an Excel file
+LOAD_ERRORS = (OSError, ValueError, KeyError, ImportError, zipfile.BadZipFile)
+# Queries containing these are regular expressions for str.contains and cannot use the index
+REGEX_CHARS = frozenset('.^$*+?{}[]\\|()')
+# Results shown per page in the interactive session
+PAGE_SIZE = 20
+SESSION_HELP = """Type a search term to search the Module and Description columns.
+  :n / :next      next page of results
+  :p / :prev      previous page of results
+  :limit N        keep at most N results per search (0 for no limit)
+  :help           show this help
+  :q / :quit      exit (or Ctrl-D)"""
+
+
+def _file_hash(file_path):
+    """
+    Return the SHA-256 of a file, read in 1 MiB chunks.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _array_from_bytes(typecode, data):
+    """
+    Return an array of the given type code holding the raw bytes in data.
+    """
+    values = array(typecode)
+    values.frombytes(data)
+    return values
+
+
+def _pack_strings(strings):
+    """
+    Pack strings as two blobs: the length of each string as array('I') and the strings
+    back to back as UTF-8.
+    """
+    return array('I', map(len, strings)).tobytes(), ''.join(strings).encode('utf-8')
+
+
+def _unpack_strings(lengths, data):
+    """
+    Return the list of strings packed by _pack_strings().
+    """
+    text = data.decode('utf-8')
+    strings = []
+    pos = 0
+    for length in _array_from_bytes('I', lengths):
+        strings.append(text[pos:pos + length])
+        pos += length
+    if pos != len(text):
+        raise ValueError("cached string lengths do not match the string data")
+    return strings
+
+
+def _pack_column(column):
+    """
+    Pack a DataFrame column as (dtype, blobs). Numeric and datetime64 columns are stored as
+    their raw array bytes. Object columns are stored as a type tag per cell and one typed
+    blob per kind of value: the strings (see _pack_strings()), the floats (NaN included) as
+    array('d'), and the ints, bools, dates and times as array('q'), so every cell comes
+    back with the type it was read with.
+    Raises ValueError for columns or cells the cache cannot store.
+    """
+    dtype = column.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind in 'biufmM':
+        return str(dtype), [column.to_numpy().tobytes()]
+    if dtype != object:
+        raise ValueError(f"cannot cache {dtype} columns")
+    tags = bytearray()
+    strings = []
+    floats = array('d')
+    ints = array('q')
+    for value in column:
+        kind = type(value)
+        if kind is str:
+            tags.append(CELL_STR)
+            strings.append(value)
+        elif kind is float:
+            tags.append(CELL_FLOAT)
+            floats.append(value)
+        elif kind is int or kind is bool:
+            tags.append(CELL_BOOL if kind is bool else CELL_INT)
+            ints.append(value)
+        elif value is None:
+            tags.append(CELL_NONE)
+        elif kind is pd.Timestamp and value.tz is None:
+            tags.append(CELL_TIMESTAMP)
+            ints.append(value.value)
+        elif kind is datetime and value.tzinfo is None:
+            tags.append(CELL_DATETIME)
+            ints.append((value - EPOCH) // MICROSECOND)
+        elif kind is time and value.tzinfo is None:
+            tags.append(CELL_TIME)
+            ints.append((datetime.combine(EPOCH, value) - EPOCH) // MICROSECOND)
+        else:
+            raise ValueError(f"cannot cache {kind.__name__} cells")
+    return 'object', [bytes(tags), *_pack_strings(strings), floats.tobytes(), ints.tobytes()]
+
+
+def _unpack_column(dtype, blobs):
+    """
+    Return the column packed by _pack_column() as a pandas Series.
+    """
+    if dtype != 'object':
+        try:
+            dtype = np.dtype(dtype)
+        except TypeError:
+            raise ValueError(f"unknown cached column type {dtype!r}") from None
+        return pd.Series(np.frombuffer(blobs[0], dtype=dtype).copy())
+    tags, lengths, text, float_data, int_data = blobs
+    strings = iter(_unpack_strings(lengths, text))
+    floats = iter(_array_from_bytes('d', float_data))
+    ints = iter(_array_from_bytes('q', int_data))
+    readers = {
+        CELL_STR: strings.__next__,
+        CELL_FLOAT: floats.__next__,
+        CELL_INT: ints.__next__,
+        CELL_BOOL: lambda: bool(next(ints)),
+        CELL_NONE: lambda: None,
+        CELL_DATETIME: lambda: EPOCH + next(ints) * MICROSECOND,
+        CELL_TIMESTAMP: lambda: pd.Timestamp(next(ints)),
+        CELL_TIME: lambda: datetime.time(EPOCH + next(ints) * MICROSECOND),
+    }
+    try:
+        return pd.Series([readers[tag]() for tag in tags], dtype=object)
+    except StopIteration:
+        raise ValueError("cached cell tags do not match the cell data") from None
+
+
+def _pack_index(index, rows):
+    """
+    Pack the trigram index as (typecode, blobs). The blobs are the trigrams (see
+    _pack_strings()), the number of rows of each trigram as array('I') and all row positions
+    back to back, as array('H') when there are fewer than 65536 rows and array('I') otherwise.
+    """
+    typecode = 'H' if rows <= 0xFFFF else 'I'
+    postings = array(typecode, itertools.chain.from_iterable(index.values()))
+    counts = array('I', map(len, index.values()))
+    return typecode, [*_pack_strings(list(index)), counts.tobytes(), postings.tobytes()]
+
+
+def _unpack_index(typecode, blobs):
+    """
+    Return the trigram index packed by _pack_index().
+    """
+    if typecode not in ('H', 'I'):
+        raise ValueError(f"unknown cached row position type {typecode!r}")
+    lengths, text, count_data, posting_data = blobs
+    postings = memoryview(posting_data)
+    itemsize = array(typecode).itemsize
+    index = {}
+    pos = 0
+    for gram, count in zip(_unpack_strings(lengths, text), _array_from_bytes('I', count_data)):
+        index[gram] = _array_from_bytes(typecode, postings[pos:pos + count * itemsize])
+        pos += count * itemsize
+    if pos != len(postings):
+        raise ValueError("cached row counts do not match the row positions")
+    return index
+
+
+def _read_cache(cache_path, file_path, stat):
+    """
+    Return (data, index) from the cache if it still matches the workbook, otherwise None.
+    The cache starts with a line of JSON: the cache version, the workbook's size, mtime and
+    SHA-256, and the layout and size of the binary blobs that follow it (see _write_cache()).
+    A stale cache is rejected after reading the header only.
+    A workbook with a new mtime but the same size and hash (copied or touched) is a match,
+    and the cache key is refreshed.
+    """
+    try:
+        with open(cache_path, 'rb') as f:
+            header = json.loads(f.readline())
+            if not isinstance(header, dict):
+                raise ValueError("the cache header is not a JSON object")
+            if header['version'] != CACHE_VERSION or header['size'] != stat.st_size:
+                return None
+            touched = header['mtime'] != stat.st_mtime_ns
+            if touched and header['sha256'] != _file_hash(file_path):
+                return None
+            blobs = [f.read(size) for size in header['blobs']]
+        if [len(blob) for blob in blobs] != header['blobs']:
+            raise ValueError("the cache is truncated")
+        blobs = iter(blobs)
+        data = pd.DataFrame({
+            name: _unpack_column(dtype, [next(blobs) for _ in range(count)])
+            for name, dtype, count in header['columns']})
+        index = _unpack_index(header['postings'], list(blobs))
+    except (OSError, ValueError, KeyError):
+        # A missing, unreadable or damaged cache is rebuilt from the workbook
+        return None
+    if touched:
+        _write_cache(cache_path, stat, header['sha256'], data, index)
+    return data, index
+
+
+def _pack_cache(data, index):
+    """
+    Pack the data and the index as (layout, blobs): the blobs of every column (see
+    _pack_column()) and of the index (see _pack_index()), and the header entries that
+    describe them.
+    """
+    columns = []
+    blobs = []
+    for name in data.columns:
+        dtype, column_blobs = _pack_column(data[name])
+        columns.append((name, dtype, len(column_blobs)))
+        blobs.extend(column_blobs)
+    postings, index_blobs = _pack_index(index, len(data))
+    blobs.extend(index_blobs)
+    layout = {'columns': columns, 'postings': postings, 'blobs': [len(blob) for blob in blobs]}
+    return layout, blobs
+
+
+def _write_cache(cache_path, stat, sha256, data, index):
+    """
+    Write the cache next to the workbook: a line of JSON with the cache key and the layout,
+    then the blobs (see _pack_cache()).
+    A cache that cannot be written, or data it cannot store, is skipped.
+    """
+    try:
+        layout, blobs = _pack_cache(data, index)
+    except (ValueError, OverflowError):
+        return
+    header = {'version': CACHE_VERSION, 'size': stat.st_size, 'mtime': stat.st_mtime_ns,
+              'sha256': sha256, **layout}
+    tmp_path = cache_path + '.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(json.dumps(header).encode('utf-8') + b'\n')
+            for blob in blobs:
+                f.write(blob)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+
+
+def read_xlsx_data(file_path):
+    """
+    Parse an Excel file and extract 'Module' and 'Description' columns from all sheets.
+    Returns a combined DataFrame with an additional 'Sheet' column.
+    """
+    # Read all sheets into a dictionary of DataFrames
+    xls = pd.read_excel(file_path, sheet_name=None, skiprows=4)
+    combined = []
+    for sheet_name, df in xls.items():
+        # Check if the required columns exist
+        if 'Modules' in df.columns and 'Description' in df.columns:
+            temp = df[['Modules', 'Description']].rename(
+                columns={'Modules': 'Module'}).copy()
+            temp['Sheet'] = sheet_name
+            combined.append(temp)
+    if not combined:
+        print(
+            "The required columns ('Modules' and 'Description') are not present in any sheet.")
+        return None
+    return pd.concat(combined, ignore_index=True)
+
+
+def build_search_index(data):
+    """
+    Build a trigram inverted index over the 'Module' and 'Description' columns.
+    Maps every trigram of the lower-cased text to the row positions containing it, in order.
+    """
+    index = {}
+    modules = data['Module'].astype(str).str.lower()
+    descriptions = data['Description'].astype(str).str.lower()
+    for pos, (module, description) in enumerate(zip(modules, descriptions)):
+        # The newline keeps trigrams from spanning the two columns
+        text = module + '\n' + description
+        for gram in {text[i:i + 3] for i in range(len(text) - 2)}:
+            postings = index.get(gram)
+            if postings is None:
+                index[gram] = postings = array('I')
+            postings.append(pos)
+    return index
+
+
+def _load(file_path, cache_path):
+    """
+    Return (data, index) from the cache, or from the workbook when the cache is stale.
+    """
+    if cache_path is False:
+        data = read_xlsx_data(file_path)
+        return data, None if data is None else build_search_index(data)
+    cache_path = cache_path or file_path + '.cache'
+    stat = os.stat(file_path)
+    cache = _read_cache(cache_path, file_path, stat)
+    if cache is not None:
+        return cache
+    sha256 = _file_hash(file_path)
+    data = read_xlsx_data(file_path)
+    if data is None:
+        return None, None
+    index = build_search_index(data)
+    _write_cache(cache_path, stat, sha256, data, index)
+    return data, index
+
+
+def load_xlsx_data(file_path, cache_path=None):
     """
     Load an Excel file and extract 'Module' and 'Description' columns from all sheets.
     Returns a combined DataFrame with an additional 'Sheet' column.
+    The result is cached next to the workbook (file_path + '.cache') keyed by the workbook's
+    size, mtime and SHA-256, so the workbook is only parsed again when it changes.
+    Pass cache_path=False to always parse the workbook.
+    """
+    return load_search_data(file_path, cache_path)[0]
+
+
+def load_search_data(file_path, cache_path=None):
+    """
+    Like load_xlsx_data(), but returns (data, index) where index is the trigram index from
+    build_search_index(). The index is cached along with the data.
     """
     try:
-        # Read all sheets into a dictionary of DataFrames
-        xls = pd.read_excel(file_path, sheet_name=None, skiprows=4)
-        combined = []
-        for sheet_name, df in xls.items():
-            # Check if the required columns exist
-            if 'Modules' in df.columns and 'Description' in df.columns:
-                temp = df[['Modules', 'Description']].rename(
-                    columns={'Modules': 'Module'}).copy()
-                temp['Sheet'] = sheet_name
-                combined.append(temp)
-        if not combined:
-            print(
-                "The required columns ('Modules' and 'Description') are not present in any sheet.")
-            return None
-        return pd.concat(combined, ignore_index=True)
-    except Exception as e:
+        return _load(file_path, cache_path)
+    except LOAD_ERRORS as e:
         print(f"Error loading Excel file: {e}")
-        return None
+        return None, None
+
+
+def _index_candidates(index, query):
+    """
+    Return the sorted row positions that contain every trigram of the query.
+    """
+    grams = {query[i:i + 3] for i in range(len(query) - 2)}
+    postings = sorted((index.get(gram, ()) for gram in grams), key=len)
+    candidates = set(postings[0])
+    for rows in postings[1:]:
+        if not candidates:
+            break
+        candidates.intersection_update(rows)
+    return sorted(candidates)
 
 
-def search_data(data, query):
+def search_data(data, query, index=None):
     """
     Search for a query in the 'Module' or 'Description' columns.
+    With an index from build_search_index(), plain queries of three or more characters
+    only check the rows that contain all of the query's trigrams.
     """
     if data is None or data.empty:
         print("No data available to search.")
         return None
 
+    if index is not None and len(query) >= 3 and not REGEX_CHARS.intersection(query):
+        data = data.iloc[_index_candidates(index, query.lower())]
+
     # Perform case-insensitive search
     result = data[
         data['Module'].astype(str).str.contains(query, case=False, na=False) |
@@ -44,23 +381,169 @@ def search_data(data, query):
     return result
 
 
-if __name__ == "__main__":
-    # Path to the Excel file
-    file_path = "collection_sheet.xlsx"
+def rank_results(results, query):
+    """
+    Order search results best match first and add a 'Rank' column: 1 when the Module is the
+    query, 2 when it starts with it, 3 when it contains it and 4 when only the Description
+    matches. Rows of the same rank keep their sheet order.
+    """
+    module = results['Module'].astype(str)
+    rank = pd.Series(4, index=results.index)
+    rank[module.str.contains(query, case=False, na=False)] = 3
+    rank[module.str.match(query, case=False, na=False)] = 2
+    rank[module.str.fullmatch(query, case=False, na=False)] = 1
+    return results.assign(Rank=rank).sort_values('Rank', kind='stable')
 
-    # Load data from the Excel file
-    data = load_xlsx_data(file_path)
 
-    if data is not None:
+def search_ranked(data, query, index=None, limit=None):
+    """
+    Search for a query with search_data(), rank the results and keep at most limit of them.
+    Raises re.error if the query is not a valid regular expression.
+    """
+    results = search_data(data, query, index)
+    if results is None or results.empty:
+        return results
+    results = rank_results(results, query)
+    return results if limit is None else results.head(limit)
+
+
+def _print_page(results, page, page_size):
+    """
+    Print one page of ranked results.
+    """
+    pages = math.ceil(len(results) / page_size)
+    start = page * page_size
+    end = min(start + page_size, len(results))
+    print(f"Results {start + 1}-{end} of {len(results)} (page {page + 1}/{pages}):")
+    print(results.iloc[start:end].to_string())
+
+
+def run_session(data, index=None, limit=None, page_size=PAGE_SIZE):
+    """
+    Answer search terms until :quit or end of input, with the data loaded only once.
+    """
+    print(SESSION_HELP)
+    results = None
+    page = 0
+    while True:
+        try:
+            line = input("search> ").strip()
+        except (EOFError, KeyboardInterrupt):
+            print()
+            break
+        if not line:
+            continue
+        if line in (':q', ':quit'):
+            break
+        if line == ':help':
+            print(SESSION_HELP)
+            continue
+        if line in (':n', ':next', ':p', ':prev'):
+            if results is None:
+                print("No results to page through.")
+                continue
+            last_page = math.ceil(len(results) / page_size) - 1
+            page = min(page + 1, last_page) if line in (':n', ':next') else max(page - 1, 0)
+        elif line.split()[0] == ':limit':
+            value = line[len(':limit'):].strip()
+            if not value.isdigit():
+                print("Usage: :limit N (0 for no limit)")
+                continue
+            limit = int(value) or None
+            print(f"Result limit: {limit or 'none'}")
+            continue
+        else:
+            try:
+                results = search_ranked(data, line, index, limit)
+            except re.error as e:
+                print(f"Invalid search term: {e}")
+                continue
+            page = 0
+            if results is None or results.empty:
+                results = None
+                print("No matching results found.")
+                continue
+        _print_page(results, page, page_size)
+
+
+def run_batch(data, queries, output, index=None, limit=None):
+    """
+    Answer every search term in queries (one per line, blank lines skipped) and write all
+    results as one CSV, with the search term in a 'Query' column, once every term is answered.
+    Returns the number of result rows written.
+    """
+    columns = ['Query', 'Rank', 'Module', 'Description', 'Sheet']
+    frames = []
+    for line in queries:
+        query = line.strip()
+        if not query:
+            continue
+        try:
+            results = search_ranked(data, query, index, limit)
+        except re.error as e:
+            print(f"Invalid search term {query!r}: {e}", file=sys.stderr)
+            continue
+        if results is not None and not results.empty:
+            frames.append(results.assign(Query=query))
+    if frames:
+        combined = pd.concat(frames, ignore_index=True)[columns]
+    else:
+        combined = pd.DataFrame(columns=columns)
+    combined.to_csv(output, index=False)
+    return len(combined)
+
+
+def _limit_arg(value):
+    """
+    argparse type for --limit: a non-negative result count, with 0 meaning no limit as in the
+    session's :limit command.
+    """
+    try:
+        limit = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid limit: {value!r}") from None
+    if limit < 0:
+        raise argparse.ArgumentTypeError(f"limit must not be negative: {limit}")
+    return limit or None
+
+
+def main():
+    """
+    Load the workbook once, then search it in an interactive session or answer a batch file.
+    """
+    parser = argparse.ArgumentParser(
+        description="Search the Module and Description columns of a collection workbook.")
+    parser.add_argument("file_path", nargs="?", default="collection_sheet.xlsx",
+                        help="Excel file to search (default: collection_sheet.xlsx)")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="read search terms from FILE, one per line ('-' for stdin), "
+                             "and write every result as CSV instead of starting a session")
+    parser.add_argument("--output", metavar="FILE",
+                        help="CSV file for --batch results (default: stdout)")
+    parser.add_argument("--limit", type=_limit_arg,
+                        help="keep at most this many results per search (0 for no limit)")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE,
+                        help=f"results per page in the session (default: {PAGE_SIZE})")
+    args = parser.parse_args()
+    if args.page_size < 1:
+        parser.error("--page-size must be at least 1")
+
+    # Load data and its search index from the Excel file (or its cache)
+    data, index = load_search_data(args.file_path)
+    if data is None:
+        return
+
+    output = args.output or sys.stdout
+    if args.batch == '-':
+        run_batch(data, sys.stdin, output, index, args.limit)
+    elif args.batch:
+        with open(args.batch, encoding='utf-8') as queries:
+            run_batch(data, queries, output, index, args.limit)
+    else:
         print("Data loaded successfully. Here's a preview:")
         print(data.head())
+        run_session(data, index, args.limit, args.page_size)
 
-        # Prompt user for a search query
-        query = input("Enter a search term (module name or description): ")
-        search_results = search_data(data, query)
 
-        if search_results is not None and not search_results.empty:
-            print("Search results:")
-            print(search_results)
-        else:
-            print("No matching results found.")
+if __name__ == "__main__":
+    main()